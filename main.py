@@ -11,6 +11,7 @@ from typing import Dict, List, Optional, Any, Union
 import logging
 from pydantic import BaseModel, ValidationError
 import aiofiles
+import aiofiles.os
 import shutil
 import threading
 import concurrent.futures
@@ -44,7 +45,12 @@ from utils.models import (
 )
 from utils.usage_tracker import usage_tracker
 from utils.storage_manager import storage_manager
-from utils.stripe_routes import router as stripe_router
+from utils.stripe_routes import (
+    router as stripe_router,
+    warm_connections as warm_stripe_connections,
+    close_connections as close_stripe_connections
+)
+from utils.transcription_service import close_connections as close_transcription_connections
 from utils.process_monitor import process_monitor
 from utils.enhanced_video_service import EnhancedVideoService
 
@@ -834,6 +840,13 @@ async def process_ai_enhanced_video_internal(
                         job_mgr, _, _, _ = get_components()
                         await job_mgr.set_job_error(job_id, "AI processing timed out after 60 minutes")
                         logger.error(f"❌ AI Job {job_id} timed out after 60 minutes")
+                    finally:
+                        # Connections opened on this job's loop must be closed before the loop is
+                        await asyncio.gather(
+                            storage_manager.close(),
+                            close_transcription_connections(),
+                            return_exceptions=True
+                        )
                 
                 loop.run_until_complete(process_with_timeout())
                 loop.close()
@@ -1113,6 +1126,13 @@ async def process_video_internal(
                             job_mgr, _, _, _ = get_components()
                             await job_mgr.set_job_error(job_id, "Job timed out after 90 minutes - video may be too large or have complex effects")
                             logger.error(f"❌ Job {job_id} timed out after 90 minutes")
+                        finally:
+                            # Connections opened on this job's loop must be closed before the loop is
+                            await asyncio.gather(
+                                storage_manager.close(),
+                                close_transcription_connections(),
+                                return_exceptions=True
+                            )
                     
                     loop.run_until_complete(process_with_timeout())
                     
@@ -1236,24 +1256,25 @@ async def get_job_status_api(job_id: str):
                         # Get all user clips and filter by job_id
                         user_clips = await storage_manager.get_user_clips(user_id)
                         
-                        # Filter clips for this specific job using job_id
+                        # Filter clips for this specific job using job_id, then sign their URLs in one batch
+                        job_rows = [clip for clip in user_clips if clip.get('job_id') == job_id]
+                        await storage_manager.add_signed_urls(job_rows)
+                        
                         job_clips = []
-                        for clip in user_clips:
-                            # Check if clip belongs to this job by job_id
-                            if clip.get('job_id') == job_id:
-                                # Add stream URLs for frontend
-                                clip_with_urls = {
-                                    'filename': clip.get('filename', ''),
-                                    'title': clip.get('title', ''),
-                                    'duration': clip.get('duration', 0),
-                                    'file_size': clip.get('file_size', 0),
-                                    'hook_title': clip.get('hook_title'),
-                                    'viral_potential': clip.get('viral_potential'),
-                                    'created_at': clip.get('created_at'),
-                                    'stream_url': storage_manager.get_clip_url(clip['storage_path']) if clip.get('storage_path') else None,
-                                    'thumbnail_url': storage_manager.get_clip_url(clip['thumbnail_path']) if clip.get('thumbnail_path') else None
-                                }
-                                job_clips.append(clip_with_urls)
+                        for clip in job_rows:
+                            # Add stream URLs for frontend
+                            clip_with_urls = {
+                                'filename': clip.get('filename', ''),
+                                'title': clip.get('title', ''),
+                                'duration': clip.get('duration', 0),
+                                'file_size': clip.get('file_size', 0),
+                                'hook_title': clip.get('hook_title'),
+                                'viral_potential': clip.get('viral_potential'),
+                                'created_at': clip.get('created_at'),
+                                'stream_url': clip.get('stream_url'),
+                                'thumbnail_url': clip.get('thumbnail_url')
+                            }
+                            job_clips.append(clip_with_urls)
                         
                         job_data['clips'] = job_clips
                         logger.info(f"✅ Fetched {len(job_clips)} clips from storage for job {job_id}")
@@ -1500,14 +1521,8 @@ async def get_user_clips_api(user_id: str):
     try:
         logger.info(f"📋 Getting clips for user: {user_id}")
         
-        clips = await storage_manager.get_user_clips(user_id)
-        
-        # Add signed URLs for each clip
-        for clip in clips:
-            if clip.get("storage_path"):
-                clip["stream_url"] = storage_manager.get_clip_url(clip["storage_path"])
-            if clip.get("thumbnail_path"):
-                clip["thumbnail_url"] = storage_manager.get_clip_url(clip["thumbnail_path"])
+        # Signed URLs for every clip are created in one batch request
+        clips = await storage_manager.get_user_clips(user_id, include_urls=True)
         
         return {
             "clips": clips,
@@ -1900,47 +1915,58 @@ async def process_ai_enhanced_video_background(
             "Storage Upload"
         )
         
-        uploaded_clips = []
+        # Collect every clip up front so several uploads stay in flight
+        pending_uploads = []
         for i, clip in enumerate(clips):
             try:
                 local_clip_path = f"output/{job_id}/{clip.filename}"
                 
-                if os.path.exists(local_clip_path):
-                    file_size = os.path.getsize(local_clip_path)
-                    storage_path = await storage_manager.upload_and_cleanup_clip(user_id, local_clip_path, clip.filename)
+                if await aiofiles.os.path.exists(local_clip_path):
+                    file_size = await aiofiles.os.path.getsize(local_clip_path)
+                    
+                    # Upload clip and thumbnail concurrently
+                    thumbnail_filename = clip.filename.replace('.mp4', '.jpg')
+                    local_thumbnail_path = f"thumbnails/{job_id}/{thumbnail_filename}"
+                    if not await aiofiles.os.path.exists(local_thumbnail_path):
+                        local_thumbnail_path = None
+                    
+                    bundle = (user_id, local_clip_path, clip.filename, local_thumbnail_path, thumbnail_filename)
+                    pending_uploads.append((i, clip, file_size, bundle))
                     
-                    if storage_path:
-                        # Handle thumbnail upload
-                        thumbnail_path = None
-                        local_thumbnail_path = f"thumbnails/{job_id}/{clip.filename.replace('.mp4', '.jpg')}"
-                        
-                        if os.path.exists(local_thumbnail_path):
-                            thumbnail_filename = clip.filename.replace('.mp4', '.jpg')
-                            thumbnail_path = await storage_manager.upload_and_cleanup_thumbnail(user_id, local_thumbnail_path, thumbnail_filename)
-                        
-                        # Save clip metadata with AI-enhanced flags
-                        clip_data = {
-                            "filename": clip.filename,
-                            "title": getattr(clip, 'title', f"AI Clip {i+1}"),
-                            "duration": getattr(clip, 'duration', 0),
-                            "file_size": file_size,
-                            "storage_path": storage_path,
-                            "thumbnail_path": thumbnail_path,
-                            "hook_title": getattr(clip, 'hook_title', None),
-                            "viral_potential": getattr(clip, 'viral_potential', None),
-                            "ai_enhanced": True,  # Mark as AI-enhanced
-                            "has_captions": True  # Mark as having captions
-                        }
-                        
-                        metadata_saved = await storage_manager.save_clip_metadata(user_id, job_id, clip_data)
-                        
-                        if metadata_saved:
-                            uploaded_clips.append(clip.filename)
-                            logger.info(f"✅ [{request_id}] Uploaded AI clip with captions: {clip.filename}")
-                        
             except Exception as upload_error:
                 logger.error(f"❌ [{request_id}] Error uploading AI clip {clip.filename}: {str(upload_error)}")
         
+        upload_results = await storage_manager.upload_clip_bundles(
+            [bundle for _, _, _, bundle in pending_uploads]
+        )
+        
+        uploaded_clip_data = []
+        for (i, clip, file_size, _), (storage_path, thumbnail_path) in zip(pending_uploads, upload_results):
+            try:
+                if storage_path:
+                    # Save clip metadata with AI-enhanced flags
+                    clip_data = {
+                        "filename": clip.filename,
+                        "title": getattr(clip, 'title', f"AI Clip {i+1}"),
+                        "duration": getattr(clip, 'duration', 0),
+                        "file_size": file_size,
+                        "storage_path": storage_path,
+                        "thumbnail_path": thumbnail_path,
+                        "hook_title": getattr(clip, 'hook_title', None),
+                        "viral_potential": getattr(clip, 'viral_potential', None),
+                        "ai_enhanced": True,  # Mark as AI-enhanced
+                        "has_captions": True  # Mark as having captions
+                    }
+                    uploaded_clip_data.append(clip_data)
+                    
+            except Exception as upload_error:
+                logger.error(f"❌ [{request_id}] Error uploading AI clip {clip.filename}: {str(upload_error)}")
+        
+        # Save every uploaded clip's metadata in one insert
+        uploaded_clips = await storage_manager.save_clip_metadata_batch(user_id, job_id, uploaded_clip_data)
+        for filename in uploaded_clips:
+            logger.info(f"✅ [{request_id}] Uploaded AI clip with captions: {filename}")
+        
         await job_mgr.update_step_status(job_id, "storage_upload", "completed", 100.0)
         
         # Final completion
@@ -2552,56 +2578,68 @@ async def process_video_background_enhanced(
                 "Storage Upload"
             )
             
-            uploaded_clips = []
+            # Collect every clip up front so several uploads stay in flight
+            pending_uploads = []
             for i, clip in enumerate(clips):
                 try:
                     # Get the local file path
                     local_clip_path = f"output/{job_id}/{clip.filename}"
                     
-                    if os.path.exists(local_clip_path):
+                    if await aiofiles.os.path.exists(local_clip_path):
                         # Get file size before upload (since file will be deleted)
-                        file_size = os.path.getsize(local_clip_path)
+                        file_size = await aiofiles.os.path.getsize(local_clip_path)
                         
-                        # Upload to Supabase Storage and immediately delete local file
-                        storage_path = await storage_manager.upload_and_cleanup_clip(user_id, local_clip_path, clip.filename)
+                        # Upload clip and thumbnail concurrently and immediately delete local files
+                        thumbnail_filename = clip.filename.replace('.mp4', '.jpg')
+                        local_thumbnail_path = f"thumbnails/{job_id}/{thumbnail_filename}"
+                        if not await aiofiles.os.path.exists(local_thumbnail_path):
+                            local_thumbnail_path = None
                         
-                        if storage_path:
-                            # Handle thumbnail upload if exists
-                            thumbnail_path = None
-                            local_thumbnail_path = f"thumbnails/{job_id}/{clip.filename.replace('.mp4', '.jpg')}"
-                            
-                            if os.path.exists(local_thumbnail_path):
-                                thumbnail_filename = clip.filename.replace('.mp4', '.jpg')
-                                thumbnail_path = await storage_manager.upload_and_cleanup_thumbnail(user_id, local_thumbnail_path, thumbnail_filename)
-                                if thumbnail_path:
-                                    logger.info(f"🖼️ [{request_id}] Uploaded thumbnail: {thumbnail_filename}")
-                            
-                            # Save clip metadata
-                            clip_data = {
-                                "filename": clip.filename,
-                                "title": getattr(clip, 'title', f"Clip {i+1}"),
-                                "duration": getattr(clip, 'duration', 0),
-                                "file_size": file_size,
-                                "storage_path": storage_path,
-                                "thumbnail_path": thumbnail_path,
-                                "hook_title": getattr(clip, 'hook_title', None),
-                                "viral_potential": getattr(clip, 'viral_potential', None)
-                            }
-                            
-                            metadata_saved = await storage_manager.save_clip_metadata(user_id, job_id, clip_data)
-                            
-                            if metadata_saved:
-                                uploaded_clips.append(clip.filename)
-                                logger.info(f"✅ [{request_id}] Uploaded and saved: {clip.filename}")
-                            else:
-                                logger.warning(f"⚠️ [{request_id}] Uploaded but failed to save metadata: {clip.filename}")
-                        else:
-                            logger.warning(f"⚠️ [{request_id}] Failed to upload: {clip.filename}")
+                        bundle = (user_id, local_clip_path, clip.filename, local_thumbnail_path, thumbnail_filename)
+                        pending_uploads.append((i, clip, file_size, thumbnail_filename, bundle))
                     else:
                         logger.warning(f"⚠️ [{request_id}] Local file not found: {local_clip_path}")
                         
                 except Exception as upload_error:
                     logger.error(f"❌ [{request_id}] Error uploading {clip.filename}: {str(upload_error)}")
+            
+            upload_results = await storage_manager.upload_clip_bundles(
+                [bundle for _, _, _, _, bundle in pending_uploads]
+            )
+            
+            uploaded_clip_data = []
+            for (i, clip, file_size, thumbnail_filename, _), (storage_path, thumbnail_path) in zip(pending_uploads, upload_results):
+                try:
+                    if thumbnail_path:
+                        logger.info(f"🖼️ [{request_id}] Uploaded thumbnail: {thumbnail_filename}")
+                    
+                    if storage_path:
+                        # Save clip metadata
+                        clip_data = {
+                            "filename": clip.filename,
+                            "title": getattr(clip, 'title', f"Clip {i+1}"),
+                            "duration": getattr(clip, 'duration', 0),
+                            "file_size": file_size,
+                            "storage_path": storage_path,
+                            "thumbnail_path": thumbnail_path,
+                            "hook_title": getattr(clip, 'hook_title', None),
+                            "viral_potential": getattr(clip, 'viral_potential', None)
+                        }
+                        uploaded_clip_data.append(clip_data)
+                    else:
+                        logger.warning(f"⚠️ [{request_id}] Failed to upload: {clip.filename}")
+                        
+                except Exception as upload_error:
+                    logger.error(f"❌ [{request_id}] Error uploading {clip.filename}: {str(upload_error)}")
+            
+            # Save every uploaded clip's metadata in one insert
+            uploaded_clips = await storage_manager.save_clip_metadata_batch(user_id, job_id, uploaded_clip_data)
+            saved_filenames = set(uploaded_clips)
+            for clip_data in uploaded_clip_data:
+                if clip_data["filename"] in saved_filenames:
+                    logger.info(f"✅ [{request_id}] Uploaded and saved: {clip_data['filename']}")
+                else:
+                    logger.warning(f"⚠️ [{request_id}] Uploaded but failed to save metadata: {clip_data['filename']}")
             await job_mgr.update_step_status(job_id, "storage_upload", "completed", 100.0)
 
             logger.info(f"📤 [{request_id}] Successfully uploaded {len(uploaded_clips)}/{len(clips)} clips to storage")
@@ -2611,11 +2649,19 @@ async def process_video_background_enhanced(
                 # Get updated clips with storage URLs
                 user_clips = await storage_manager.get_user_clips(user_id)
                 
+                # Match this job's clips to their stored rows (newest first) and sign their URLs in one batch
+                stored_by_filename = {}
+                for stored in user_clips:
+                    stored_by_filename.setdefault(stored.get('filename'), stored)
+                await storage_manager.add_signed_urls(
+                    [stored_by_filename[clip.filename] for clip in clips if clip.filename in stored_by_filename]
+                )
+                
                 # Find clips for this job and update with stream URLs
                 updated_clips = []
                 for clip in clips:
                     # Find the corresponding clip in storage
-                    stored_clip = next((c for c in user_clips if c.get('filename') == clip.filename), None)
+                    stored_clip = stored_by_filename.get(clip.filename)
                     
                     if stored_clip:
                         # Create updated clip with stream URLs
@@ -2632,15 +2678,15 @@ async def process_video_background_enhanced(
                                 hook_title=getattr(clip, 'hook_title', None),
                                 engagement_score=getattr(clip, 'engagement_score', None),
                                 viral_potential=getattr(clip, 'viral_potential', None),
-                                thumbnail_url=storage_manager.get_clip_url(stored_clip['thumbnail_path']) if stored_clip.get('thumbnail_path') else None,
-                                stream_url=storage_manager.get_clip_url(stored_clip['storage_path']) if stored_clip.get('storage_path') else None
+                                thumbnail_url=stored_clip.get('thumbnail_url'),
+                                stream_url=stored_clip.get('stream_url')
                             )
                             updated_clips.append(updated_clip)
                         else:
                             # Dictionary clip - update directly
                             updated_clip = dict(clip)
-                            updated_clip['stream_url'] = storage_manager.get_clip_url(stored_clip['storage_path']) if stored_clip.get('storage_path') else None
-                            updated_clip['thumbnail_url'] = storage_manager.get_clip_url(stored_clip['thumbnail_path']) if stored_clip.get('thumbnail_path') else None
+                            updated_clip['stream_url'] = stored_clip.get('stream_url')
+                            updated_clip['thumbnail_url'] = stored_clip.get('thumbnail_url')
                             updated_clips.append(updated_clip)
                     else:
                         # Keep original clip if not found in storage
@@ -2777,6 +2823,12 @@ async def startup_event():
             missing_vars = [var for var in critical_env_vars if not os.getenv(var)]
             if missing_vars:
                 logger.warning(f"⚠️ Missing environment variables: {missing_vars}")
+        
+        # Open billing connections before the first checkout needs them
+        try:
+            await asyncio.wait_for(warm_stripe_connections(), timeout=10)
+        except asyncio.TimeoutError:
+            logger.warning("⚠️ Timed out warming Stripe/Supabase connections")
                 
     except Exception as e:
         logger.error(f"❌ CRITICAL: Component initialization failed: {str(e)}")
@@ -2788,18 +2840,32 @@ async def startup_event():
     if not PRODUCTION:
         logger.info("🔥 Features: MASSIVE Fonts, FIXED Video Preview, ULTRA Quality, Enhanced Game Overlays")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release pooled network clients"""
+    try:
+        await storage_manager.close()
+    except Exception as e:
+        logger.warning(f"⚠️ Error closing storage manager: {str(e)}")
+    
+    try:
+        await close_stripe_connections()
+    except Exception as e:
+        logger.warning(f"⚠️ Error closing Stripe/Supabase clients: {str(e)}")
+    
+    try:
+        await close_transcription_connections()
+    except Exception as e:
+        logger.warning(f"⚠️ Error closing OpenAI client: {str(e)}")
+
 @app.get("/api/user-clips/{user_id}")
 async def get_user_clips_api(user_id: str):
     """Get all clips for a user"""
     try:
         logger.info(f"📋 Getting clips for user: {user_id}")
         
-        clips = await storage_manager.get_user_clips(user_id)
-        
-        # Add signed URLs for each clip
-        for clip in clips:
-            if clip.get('storage_path'):
-                clip['stream_url'] = storage_manager.get_clip_url(clip['storage_path'])
+        # Signed URLs for every clip are created in one batch request
+        clips = await storage_manager.get_user_clips(user_id, include_urls=True)
         
         logger.info(f"✅ Retrieved {len(clips)} clips for user {user_id}")
         return {"clips": clips, "total": len(clips)}
@@ -13,6 +13,7 @@ class Config:
     
     # OpenAI
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+    OPENAI_CONCURRENCY = int(os.getenv("OPENAI_CONCURRENCY", 20))
     
     # Stripe
     STRIPE_SECRET_KEY = os.getenv("STRIPE_SECRET_KEY")
@@ -2,9 +2,14 @@ import os
 import logging
 import asyncio
 import json
-from typing import Dict, Any, List, Optional, Union
+import time
+import threading
+import hashlib
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Union, AsyncIterator
 from datetime import datetime
 import uuid
+from functools import lru_cache, cache
 
 try:
     import openai
@@ -15,14 +20,139 @@ except ImportError:
     openai = None
     OpenAI = None
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+    orjson = None
+
 from .config import config
 from .models import TranscriptionSegment, WordTiming
 
 logger = logging.getLogger(__name__)
 
+# orjson parses GPT responses several times faster; its errors subclass json.JSONDecodeError
+_json_loads = orjson.loads if ORJSON_AVAILABLE else json.loads
+
+# Canned subtitle lines used when GPT generation fails entirely
+_FALLBACK_TEXTS = (
+    "Check this out!",
+    "Amazing content ahead",
+    "You won't believe this",
+    "Keep watching!",
+    "Like and subscribe!"
+)
+
+class _SegmentStreamParser:
+    """Incrementally extract complete string elements from a streamed {"segments": [...]} reply"""
+    
+    def __init__(self):
+        self._in_array = False
+        self._done = False
+        self._in_string = False
+        self._escape = False
+        self._current: List[str] = []
+    
+    def feed(self, text: str) -> List[str]:
+        """Consume a chunk of the reply and return any segments completed by it"""
+        completed = []
+        
+        for ch in text:
+            if self._done:
+                break
+            if not self._in_array:
+                if ch == '[':
+                    self._in_array = True
+                continue
+            
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                    self._current.append(ch)
+                elif ch == '\\':
+                    self._escape = True
+                    self._current.append(ch)
+                elif ch == '"':
+                    self._in_string = False
+                    raw = ''.join(self._current)
+                    self._current = []
+                    try:
+                        completed.append(_json_loads(f'"{raw}"'))
+                    except ValueError:
+                        pass
+                else:
+                    self._current.append(ch)
+            elif ch == '"':
+                self._in_string = True
+            elif ch == ']':
+                self._done = True
+        
+        return completed
+
 class OpenAISubtitleService:
     """Service for generating AI-powered subtitles for video clips using OpenAI GPT"""
     
+    # Static prompt pieces are kept byte-identical across calls so the
+    # provider can reuse its prompt-prefix cache; only clip facts vary.
+    _STYLE_PROMPTS = {
+        "engaging": "Create engaging, hook-worthy subtitles that capture attention and encourage viewers to keep watching. Use dynamic language and compelling phrases.",
+        "professional": "Create professional, clear subtitles that convey information effectively. Use formal language and precise terminology.",
+        "casual": "Create casual, conversational subtitles that feel natural and relatable. Use everyday language and friendly tone.",
+        "energetic": "Create high-energy subtitles with excitement and enthusiasm. Use action words, caps for emphasis, and dynamic expressions.",
+        "educational": "Create educational subtitles that explain concepts clearly. Use instructional language and helpful explanations."
+    }
+    
+    _STYLE_RULES = """
+Requirements:
+1. Generate exactly SEGMENTS subtitle segments
+2. Each segment should be 3-8 words long
+3. Segments should flow naturally and build narrative tension
+4. Use the clip title as inspiration for the content
+5. Make it suitable for social media (viral potential)
+6. Avoid repetitive language between segments
+7. Create a compelling hook that matches the clip title
+8. Follow the writing style given in STYLE
+"""
+    
+    _SYSTEM_INTRO = (
+        "You are an expert subtitle writer for viral social media clips. "
+        "Generate engaging, attention-grabbing subtitles that maximize viewer retention.\n"
+    )
+    
+    _SYSTEM_PROMPT = _SYSTEM_INTRO + _STYLE_RULES + """
+Return ONLY a JSON object with the segments as an array of strings, like:
+{"segments": ["First subtitle segment", "Second subtitle segment", "Third subtitle segment", ...]}
+"""
+    
+    _BATCH_SYSTEM_PROMPT = _SYSTEM_INTRO + _STYLE_RULES + """
+You will receive several clips from the same video in CLIPS. Apply the
+requirements to each clip independently, using that clip's SEGMENTS count.
+
+Return ONLY a JSON object with one array of strings per clip, in the same order, like:
+{"clips": [["Clip 1 segment", "Clip 1 segment", ...], ["Clip 2 segment", ...], ...]}
+"""
+    
+    # Per-request user messages; only these vary between calls
+    _PROMPT_TEMPLATE = (
+        "VIDEO: {video_title}\n"
+        "CLIP: {clip_title}\n"
+        "DURATION: {clip_duration:.1f}\n"
+        "SEGMENTS: {num_segments}\n"
+        "CONTEXT: {context}\n"
+        "STYLE: {style_instruction}"
+    )
+    
+    _BATCH_PROMPT_TEMPLATE = (
+        "VIDEO: {video_title}\n"
+        "CONTEXT: {context}\n"
+        "STYLE: {style_instruction}\n"
+        "CLIPS: {clips}"
+    )
+    
+    # Max clips sent to GPT in a single batched request
+    BATCH_SIZE = 10
+    
     def __init__(self):
         logger.info("🔧 Initializing OpenAI Subtitle Service...")
         
@@ -43,6 +173,55 @@ class OpenAISubtitleService:
         except Exception as e:
             logger.error(f"❌ Failed to initialize OpenAI client: {str(e)}")
             raise
+        
+        # Bound in-flight GPT requests to the configured rate budget, one semaphore per event
+        # loop: the service is process-wide but jobs run on their own short-lived loops
+        self._loop_sems: Dict[asyncio.AbstractEventLoop, asyncio.Semaphore] = {}
+        self._loop_sems_lock = threading.Lock()
+        
+        # Exact-match cache of GPT subtitle content keyed by prompt inputs
+        self._cache: "OrderedDict[str, tuple]" = OrderedDict()
+        self.CACHE_MAX_SIZE = 1024
+        self.CACHE_DURATION = 3600  # 1 hour cache
+    
+    def _sem(self) -> asyncio.Semaphore:
+        """GPT request semaphore for the running event loop"""
+        loop = asyncio.get_running_loop()
+        with self._loop_sems_lock:
+            # Semaphores of loops that have since closed can't be reused, only dropped
+            for stale_loop in [owner for owner in self._loop_sems if owner.is_closed()]:
+                del self._loop_sems[stale_loop]
+            
+            sem = self._loop_sems.get(loop)
+            if sem is None:
+                sem = self._loop_sems[loop] = asyncio.Semaphore(config.OPENAI_CONCURRENCY)
+            return sem
+    
+    def _cache_key(self, *parts: Any) -> str:
+        """Hash the prompt inputs into a compact cache key"""
+        raw = "|".join(str(part) for part in parts)
+        return hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()
+    
+    def _cache_get(self, key: str) -> Optional[List[str]]:
+        """Return cached subtitle content if present and not expired"""
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        
+        content, stored_at = entry
+        if time.time() - stored_at >= self.CACHE_DURATION:
+            del self._cache[key]
+            return None
+        
+        self._cache.move_to_end(key)
+        return list(content)
+    
+    def _cache_set(self, key: str, content: List[str]):
+        """Store subtitle content, evicting the least recently used entry"""
+        self._cache[key] = (tuple(content), time.time())
+        self._cache.move_to_end(key)
+        if len(self._cache) > self.CACHE_MAX_SIZE:
+            self._cache.popitem(last=False)
     
     async def generate_subtitles_for_clip(
         self,
@@ -70,40 +249,56 @@ class OpenAISubtitleService:
         try:
             logger.info(f"📝 Generating AI subtitles for clip: '{clip_title}' ({clip_duration}s)")
             
-            # Create segments based on clip duration (aim for 2-4 second segments)
-            segment_duration = min(3.5, clip_duration / 6)  # Aim for 6-8 segments per clip
-            num_segments = max(3, int(clip_duration / segment_duration))
+            num_segments = self._calculate_num_segments(clip_duration)
             
             # Generate subtitle content using GPT
             subtitle_content = await self._generate_subtitle_content(
                 video_title, clip_title, clip_duration, num_segments, context, style
             )
             
-            # Create timed segments
-            segments = self._create_timed_segments(subtitle_content, clip_duration, num_segments)
-            
-            # Generate word-level timing (estimated)
-            words = self._generate_word_timings(segments)
-            
-            result = {
-                'text': ' '.join([seg['text'] for seg in segments]),
-                'segments': segments,
-                'words': words,
-                'clip_title': clip_title,
-                'style': style,
-                'generated_at': datetime.now().isoformat(),
-                'duration': clip_duration,
-                'language': 'en'
-            }
-            
-            logger.info(f"✅ Generated {len(segments)} subtitle segments with {len(words)} words")
-            return result
+            return self._build_subtitle_result(subtitle_content, clip_title, clip_duration, num_segments, style)
             
         except Exception as e:
             logger.error(f"❌ Error generating AI subtitles: {str(e)}")
             # Return fallback subtitles
             return self._generate_fallback_subtitles(clip_title, clip_duration)
     
+    def _calculate_num_segments(self, clip_duration: float) -> int:
+        """Create segments based on clip duration (aim for 2-4 second segments)"""
+        segment_duration = min(3.5, clip_duration / 6)  # Aim for 6-8 segments per clip
+        return max(3, int(clip_duration / segment_duration))
+    
+    def _build_subtitle_result(
+        self,
+        subtitle_content: List[str],
+        clip_title: str,
+        clip_duration: float,
+        num_segments: int,
+        style: str,
+        generated_at: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Turn generated subtitle lines into timed segments and word timings"""
+        
+        # Create timed segments
+        segments = self._create_timed_segments(subtitle_content, clip_duration, num_segments)
+        
+        # Generate word-level timing (estimated)
+        words = self._generate_word_timings(segments)
+        
+        result = {
+            'text': ' '.join([seg['text'] for seg in segments]),
+            'segments': segments,
+            'words': words,
+            'clip_title': clip_title,
+            'style': style,
+            'generated_at': generated_at or datetime.now().isoformat(),
+            'duration': clip_duration,
+            'language': 'en'
+        }
+        
+        logger.info(f"✅ Generated {len(segments)} subtitle segments with {len(words)} words")
+        return result
+    
     async def _generate_subtitle_content(
         self,
         video_title: str,
@@ -115,71 +310,245 @@ class OpenAISubtitleService:
     ) -> List[str]:
         """Generate subtitle content using GPT"""
         
-        # Build the prompt based on style
-        style_prompts = {
-            "engaging": "Create engaging, hook-worthy subtitles that capture attention and encourage viewers to keep watching. Use dynamic language and compelling phrases.",
-            "professional": "Create professional, clear subtitles that convey information effectively. Use formal language and precise terminology.",
-            "casual": "Create casual, conversational subtitles that feel natural and relatable. Use everyday language and friendly tone.",
-            "energetic": "Create high-energy subtitles with excitement and enthusiasm. Use action words, caps for emphasis, and dynamic expressions.",
-            "educational": "Create educational subtitles that explain concepts clearly. Use instructional language and helpful explanations."
-        }
+        cache_key = self._cache_key(video_title, clip_title, f"{clip_duration:.1f}", num_segments, context, style)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            logger.info(f"📋 Cache HIT for subtitle content: '{clip_title}'")
+            return cached
+        
+        try:
+            subtitle_segments = [
+                line async for line in self._stream_subtitle_content(
+                    video_title, clip_title, clip_duration, num_segments, context, style
+                )
+            ]
+            
+            if len(subtitle_segments) >= 3:
+                logger.info(f"✅ Generated {len(subtitle_segments)} AI subtitle segments")
+                self._cache_set(cache_key, subtitle_segments)
+                return subtitle_segments
+            
+            logger.warning(f"⚠️ Failed to parse GPT response, using fallback: got {len(subtitle_segments)} segments")
+            return self._generate_fallback_content(clip_title, num_segments)
+                
+        except Exception as e:
+            logger.error(f"❌ OpenAI API error: {str(e)}")
+            return self._generate_fallback_content(clip_title, num_segments)
+    
+    async def generate_subtitles_stream(
+        self,
+        video_title: str,
+        clip_title: str,
+        clip_duration: float,
+        context: Optional[str] = None,
+        style: str = "engaging"
+    ) -> AsyncIterator[str]:
+        """
+        Yield subtitle lines for a clip as soon as GPT emits each one
+        
+        Useful for previews that only need the first lines quickly. Falls back
+        to canned content when GPT produces nothing usable.
+        """
+        num_segments = self._calculate_num_segments(clip_duration)
+        cache_key = self._cache_key(video_title, clip_title, f"{clip_duration:.1f}", num_segments, context, style)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            logger.info(f"📋 Cache HIT for subtitle content: '{clip_title}'")
+            for line in cached:
+                yield line
+            return
+        
+        lines = []
+        stream = self._stream_subtitle_content(
+            video_title, clip_title, clip_duration, num_segments, context, style
+        )
+        try:
+            async for line in stream:
+                lines.append(line)
+                yield line
+        except Exception as e:
+            logger.error(f"❌ OpenAI API error while streaming: {str(e)}")
+        finally:
+            # Closes the GPT stream and frees its semaphore slot even if our consumer stops early
+            await stream.aclose()
+        
+        if len(lines) >= 3:
+            self._cache_set(cache_key, lines)
+        elif not lines:
+            for line in self._generate_fallback_content(clip_title, num_segments):
+                yield line
+    
+    async def _stream_subtitle_content(
+        self,
+        video_title: str,
+        clip_title: str,
+        clip_duration: float,
+        num_segments: int,
+        context: Optional[str] = None,
+        style: str = "engaging"
+    ) -> AsyncIterator[str]:
+        """Stream subtitle lines from GPT, yielding each as its JSON string completes"""
+        
+        # Only the per-clip facts go in the user message
+        prompt = self._PROMPT_TEMPLATE.format(
+            video_title=video_title,
+            clip_title=clip_title,
+            clip_duration=clip_duration,
+            num_segments=num_segments,
+            context=context or '-',
+            style_instruction=self._STYLE_PROMPTS.get(style, self._STYLE_PROMPTS['engaging'])
+        )
+        
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        stop = threading.Event()
+        
+        def _put(item):
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+            except RuntimeError:
+                pass  # Event loop already closed
+        
+        # The sync client's stream is consumed in a worker thread and handed
+        # to the event loop chunk by chunk
+        def _generate():
+            try:
+                stream = self.client.chat.completions.create(
+                    model="gpt-3.5-turbo",
+                    messages=[
+                        {"role": "system", "content": self._SYSTEM_PROMPT},
+                        {"role": "user", "content": prompt}
+                    ],
+                    response_format={"type": "json_object"},
+                    max_tokens=min(500, 25 * num_segments),
+                    temperature=0.8,
+                    stream=True
+                )
+                try:
+                    for chunk in stream:
+                        if stop.is_set():
+                            break
+                        if chunk.choices and chunk.choices[0].delta.content:
+                            _put(chunk.choices[0].delta.content)
+                finally:
+                    stream.close()
+            except Exception as e:
+                _put(e)
+            finally:
+                _put(None)
+        
+        parser = _SegmentStreamParser()
+        emitted = 0
+        
+        async with self._sem():
+            worker = loop.run_in_executor(None, _generate)
+            try:
+                while emitted < num_segments:
+                    item = await queue.get()
+                    if item is None:
+                        break
+                    if isinstance(item, Exception):
+                        raise item
+                    
+                    for line in parser.feed(item)[:num_segments - emitted]:
+                        emitted += 1
+                        yield line
+            finally:
+                # Lets the worker abandon the stream if we stopped reading early, and keeps the
+                # slot until its request has actually finished so worker errors surface here
+                stop.set()
+                await worker
+    
+    async def _generate_subtitle_content_batch(
+        self,
+        video_title: str,
+        clips: List[Dict[str, Any]],
+        context: Optional[str] = None,
+        style: str = "engaging"
+    ) -> List[Optional[List[str]]]:
+        """
+        Generate subtitle content for several clips with a single GPT call
+        
+        Args:
+            video_title: Original video title shared by all clips
+            clips: Dicts with 'title', 'duration' and 'num_segments'
+            context: Additional context about the video
+            style: Subtitle style
+        
+        Returns:
+            One list of subtitle lines per clip, or None for clips whose
+            content could not be generated and need the per-clip path
+        """
+        
+        results: List[Optional[List[str]]] = [None] * len(clips)
+        cache_keys = []
+        pending = []
+        
+        for i, clip in enumerate(clips):
+            cache_key = self._cache_key(
+                video_title, clip['title'], f"{clip['duration']:.1f}", clip['num_segments'], context, style
+            )
+            cache_keys.append(cache_key)
+            cached = self._cache_get(cache_key)
+            if cached is not None:
+                results[i] = cached
+            else:
+                pending.append(i)
+        
+        if not pending:
+            logger.info(f"📋 Cache HIT for all {len(clips)} clips in batch")
+            return results
+        
+        clip_specs = [
+            {
+                "i": n + 1,
+                "title": clips[i]['title'],
+                "duration": round(clips[i]['duration'], 1),
+                "segments": clips[i]['num_segments']
+            }
+            for n, i in enumerate(pending)
+        ]
+        prompt = self._BATCH_PROMPT_TEMPLATE.format(
+            video_title=video_title,
+            context=context or '-',
+            style_instruction=self._STYLE_PROMPTS.get(style, self._STYLE_PROMPTS['engaging']),
+            clips=json.dumps(clip_specs)
+        )
+        max_tokens = min(4000, sum(spec["segments"] for spec in clip_specs) * 25 + 50)
         
-        prompt = f"""
-Generate {num_segments} compelling subtitle segments for a {clip_duration:.1f}-second video clip.
-
-Video Context:
-- Original Video: "{video_title}"
-- Clip Title: "{clip_title}"
-- Duration: {clip_duration:.1f} seconds
-{f"- Additional Context: {context}" if context else ""}
-
-Style: {style_prompts.get(style, style_prompts["engaging"])}
-
-Requirements:
-1. Generate exactly {num_segments} subtitle segments
-2. Each segment should be 3-8 words long
-3. Segments should flow naturally and build narrative tension
-4. Use the clip title as inspiration for the content
-5. Make it suitable for social media (viral potential)
-6. Avoid repetitive language between segments
-7. Create a compelling hook that matches the clip title
-
-Return ONLY a JSON array of strings, like:
-["First subtitle segment", "Second subtitle segment", "Third subtitle segment", ...]
-"""
-
         try:
-            # Generate content using OpenAI
             def _generate():
                 response = self.client.chat.completions.create(
                     model="gpt-3.5-turbo",
                     messages=[
-                        {"role": "system", "content": "You are an expert subtitle writer for viral social media clips. Generate engaging, attention-grabbing subtitles that maximize viewer retention."},
+                        {"role": "system", "content": self._BATCH_SYSTEM_PROMPT},
                         {"role": "user", "content": prompt}
                     ],
-                    max_tokens=500,
+                    response_format={"type": "json_object"},
+                    max_tokens=max_tokens,
                     temperature=0.8
                 )
                 return response.choices[0].message.content.strip()
             
-            # Run in executor to avoid blocking
-            response_text = await asyncio.get_event_loop().run_in_executor(None, _generate)
+            async with self._sem():
+                response_text = await asyncio.to_thread(_generate)
             
-            # Parse the JSON response
-            try:
-                subtitle_segments = json.loads(response_text)
+            batch_segments = _json_loads(response_text).get("clips")
+            if not isinstance(batch_segments, list) or len(batch_segments) != len(pending):
+                raise ValueError("Invalid batch response format")
+            
+            for i, subtitle_segments in zip(pending, batch_segments):
                 if isinstance(subtitle_segments, list) and len(subtitle_segments) >= 3:
-                    logger.info(f"✅ Generated {len(subtitle_segments)} AI subtitle segments")
-                    return subtitle_segments[:num_segments]  # Ensure we don't exceed requested count
-                else:
-                    raise ValueError("Invalid response format")
-            except (json.JSONDecodeError, ValueError) as parse_error:
-                logger.warning(f"⚠️ Failed to parse GPT response, using fallback: {parse_error}")
-                return self._generate_fallback_content(clip_title, num_segments)
-                
+                    subtitle_segments = subtitle_segments[:clips[i]['num_segments']]
+                    self._cache_set(cache_keys[i], subtitle_segments)
+                    results[i] = subtitle_segments
+            
+            logger.info(f"✅ Generated AI subtitle content for {len(pending)} clips in one request")
+            
         except Exception as e:
-            logger.error(f"❌ OpenAI API error: {str(e)}")
-            return self._generate_fallback_content(clip_title, num_segments)
+            logger.warning(f"⚠️ Batched subtitle generation failed, falling back to per-clip requests: {str(e)}")
+        
+        return results
     
     def _generate_fallback_content(self, clip_title: str, num_segments: int) -> List[str]:
         """Generate fallback subtitle content when AI fails"""
@@ -219,54 +588,61 @@ Return ONLY a JSON array of strings, like:
         
         return segments[:num_segments]
     
+    @staticmethod
     def _create_timed_segments(
-        self,
         subtitle_content: List[str],
         clip_duration: float,
         num_segments: int
     ) -> List[Dict[str, Any]]:
         """Create timed subtitle segments"""
         
-        segments = []
         segment_duration = clip_duration / len(subtitle_content)
         
-        for i, text in enumerate(subtitle_content):
-            start_time = i * segment_duration
-            end_time = min((i + 1) * segment_duration, clip_duration)
-            
-            segments.append({
-                'start': round(start_time, 2),
-                'end': round(end_time, 2),
+        # Each boundary is both the end of one segment and the start of the next
+        boundaries = [
+            round(min(i * segment_duration, clip_duration), 2)
+            for i in range(len(subtitle_content) + 1)
+        ]
+        
+        segments = [
+            {
+                'start': boundaries[i],
+                'end': boundaries[i + 1],
                 'text': text.strip(),
                 'words': []  # Will be populated by word timing generation
-            })
+            }
+            for i, text in enumerate(subtitle_content)
+        ]
         
         return segments
     
-    def _generate_word_timings(self, segments: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    @staticmethod
+    def _generate_word_timings(segments: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Generate word-level timing for all segments"""
         
         all_words = []
         
         for segment in segments:
             words_in_segment = segment['text'].split()
-            segment_duration = segment['end'] - segment['start']
-            word_duration = segment_duration / max(1, len(words_in_segment))
+            seg_start = segment['start']
+            word_duration = (segment['end'] - seg_start) / max(1, len(words_in_segment))
             
-            segment_words = []
-            for j, word in enumerate(words_in_segment):
-                word_start = segment['start'] + (j * word_duration)
-                word_end = segment['start'] + ((j + 1) * word_duration)
-                
-                word_timing = {
-                    'start': round(word_start, 2),
-                    'end': round(word_end, 2),
+            # Each boundary is both the end of one word and the start of the next
+            boundaries = [
+                round(seg_start + (j * word_duration), 2)
+                for j in range(len(words_in_segment) + 1)
+            ]
+            
+            segment_words = [
+                {
+                    'start': boundaries[j],
+                    'end': boundaries[j + 1],
                     'text': word,
                     'word': word
                 }
-                
-                segment_words.append(word_timing)
-                all_words.append(word_timing)
+                for j, word in enumerate(words_in_segment)
+            ]
+            all_words.extend(segment_words)
             
             # Add words to the segment
             segment['words'] = segment_words
@@ -285,33 +661,22 @@ Return ONLY a JSON array of strings, like:
         # Create 3-5 basic segments
         num_segments = min(5, max(3, int(clip_duration / 3)))
         
-        fallback_texts = [
-            "Check this out!",
-            "Amazing content ahead",
-            "You won't believe this",
-            "Keep watching!",
-            "Like and subscribe!"
-        ][:num_segments]
+        text, timeline = _fallback_timeline(num_segments, clip_duration)
         
+        # Rebuild fresh dicts from the cached timeline so callers can mutate them;
+        # each word dict is shared between its segment and the top-level list
         segments = []
-        segment_duration = clip_duration / len(fallback_texts)
-        
-        for i, text in enumerate(fallback_texts):
-            start_time = i * segment_duration
-            end_time = min((i + 1) * segment_duration, clip_duration)
-            
-            segments.append({
-                'start': round(start_time, 2),
-                'end': round(end_time, 2),
-                'text': text,
-                'words': []
-            })
-        
-        # Generate word timings
-        words = self._generate_word_timings(segments)
+        words = []
+        for start, end, segment_text, segment_words in timeline:
+            word_dicts = [
+                {'start': w_start, 'end': w_end, 'text': word, 'word': word}
+                for w_start, w_end, word in segment_words
+            ]
+            words.extend(word_dicts)
+            segments.append({'start': start, 'end': end, 'text': segment_text, 'words': word_dicts})
         
         return {
-            'text': ' '.join(fallback_texts),
+            'text': text,
             'segments': segments,
             'words': words,
             'clip_title': clip_title,
@@ -333,66 +698,87 @@ Return ONLY a JSON array of strings, like:
         
         logger.info(f"📝 Generating AI subtitles for {len(clips)} clips")
         
-        subtitle_results = []
+        clip_specs = []
+        for i, clip in enumerate(clips):
+            clip_duration = clip.get('duration', 30.0)
+            clip_specs.append({
+                'title': clip.get('title', f'Clip {i+1}'),
+                'duration': clip_duration,
+                'start_time': clip.get('start_time', 0.0),
+                'num_segments': self._calculate_num_segments(clip_duration)
+            })
         
-        # Process clips in batches to avoid rate limiting
-        batch_size = 3
+        # One GPT request per group of clips; the semaphore keeps the number
+        # of in-flight requests within budget
+        batches = [clip_specs[i:i + self.BATCH_SIZE] for i in range(0, len(clip_specs), self.BATCH_SIZE)]
+        batch_contents = await asyncio.gather(
+            *(self._generate_subtitle_content_batch(video_title, batch, context, style) for batch in batches),
+            return_exceptions=True
+        )
         
-        for i in range(0, len(clips), batch_size):
-            batch = clips[i:i + batch_size]
-            batch_tasks = []
-            
-            for clip in batch:
-                task = self.generate_subtitles_for_clip(
-                    video_title=video_title,
-                    clip_title=clip.get('title', f'Clip {i+1}'),
-                    clip_duration=clip.get('duration', 30.0),
-                    start_time=clip.get('start_time', 0.0),
-                    context=context,
-                    style=style
-                )
-                batch_tasks.append(task)
-            
-            # Execute batch
-            try:
-                batch_results = await asyncio.gather(*batch_tasks, return_exceptions=True)
-                
-                for result in batch_results:
-                    if isinstance(result, Exception):
-                        logger.error(f"❌ Batch subtitle generation failed: {str(result)}")
-                        # Add fallback result
-                        subtitle_results.append(self._generate_fallback_subtitles("Clip", 30.0))
-                    else:
-                        subtitle_results.append(result)
-                
-                # Small delay between batches to respect rate limits
-                if i + batch_size < len(clips):
-                    await asyncio.sleep(1)
-                    
-            except Exception as e:
-                logger.error(f"❌ Batch processing error: {str(e)}")
-                # Add fallback results for the entire batch
-                for _ in batch:
-                    subtitle_results.append(self._generate_fallback_subtitles("Clip", 30.0))
+        generated_at = datetime.now().isoformat()
+        tasks = []
+        for batch, contents in zip(batches, batch_contents):
+            if isinstance(contents, Exception):
+                contents = [None] * len(batch)
+            for spec, subtitle_content in zip(batch, contents):
+                tasks.append(self._subtitles_from_batch_content(
+                    spec, subtitle_content, video_title, context, style, generated_at
+                ))
+        
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        
+        subtitle_results = []
+        for result in results:
+            if isinstance(result, Exception):
+                logger.error(f"❌ Clip subtitle generation failed: {str(result)}")
+                # Add fallback result
+                subtitle_results.append(self._generate_fallback_subtitles("Clip", 30.0))
+            else:
+                subtitle_results.append(result)
         
         logger.info(f"✅ Generated subtitles for {len(subtitle_results)} clips")
         return subtitle_results
     
+    async def _subtitles_from_batch_content(
+        self,
+        clip_spec: Dict[str, Any],
+        subtitle_content: Optional[List[str]],
+        video_title: str,
+        context: Optional[str],
+        style: str,
+        generated_at: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Build a clip result from batched content, or fall back to a per-clip request"""
+        
+        if subtitle_content is None:
+            return await self.generate_subtitles_for_clip(
+                video_title=video_title,
+                clip_title=clip_spec['title'],
+                clip_duration=clip_spec['duration'],
+                start_time=clip_spec['start_time'],
+                context=context,
+                style=style
+            )
+        
+        return self._build_subtitle_result(
+            subtitle_content, clip_spec['title'], clip_spec['duration'], clip_spec['num_segments'], style,
+            generated_at=generated_at
+        )
+    
     async def test_connection(self) -> Dict[str, Any]:
         """Test the OpenAI API connection"""
         
         try:
-            def _test():
-                response = self.client.chat.completions.create(
-                    model="gpt-3.5-turbo",
-                    messages=[
-                        {"role": "user", "content": "Test connection. Respond with 'OK'"}
-                    ],
-                    max_tokens=10
-                )
-                return response.choices[0].message.content.strip()
-            
-            result = await asyncio.get_event_loop().run_in_executor(None, _test)
+            response = await asyncio.to_thread(
+                self.client.chat.completions.create,
+                model="gpt-3.5-turbo",
+                messages=[
+                    {"role": "user", "content": "Test connection. Respond with 'OK'"}
+                ],
+                max_tokens=10
+            )
+            result = response.choices[0].message.content.strip()
             
             return {
                 "success": True,
@@ -407,19 +793,33 @@ Return ONLY a JSON array of strings, like:
                 "message": "OpenAI API connection failed"
             }
 
-# Global instance
-openai_subtitle_service = None
+@lru_cache(maxsize=256)
+def _fallback_timeline(num_segments: int, clip_duration: float) -> tuple:
+    """Compute the fallback text and its segment/word timings once per (segments, duration)"""
+    
+    fallback_texts = list(_FALLBACK_TEXTS[:num_segments])
+    segments = OpenAISubtitleService._create_timed_segments(fallback_texts, clip_duration, num_segments)
+    OpenAISubtitleService._generate_word_timings(segments)
+    
+    timeline = tuple(
+        (
+            segment['start'],
+            segment['end'],
+            segment['text'],
+            tuple((word['start'], word['end'], word['text']) for word in segment['words'])
+        )
+        for segment in segments
+    )
+    return ' '.join(fallback_texts), timeline
 
+@cache
 def get_openai_subtitle_service():
     """Get or create the OpenAI subtitle service instance"""
-    global openai_subtitle_service
-    
-    if openai_subtitle_service is None:
-        try:
-            openai_subtitle_service = OpenAISubtitleService()
-            logger.info("✅ OpenAI Subtitle Service initialized")
-        except Exception as e:
-            logger.error(f"❌ Failed to initialize OpenAI Subtitle Service: {str(e)}")
-            raise
-    
-    return openai_subtitle_service
+    try:
+        service = OpenAISubtitleService()
+        logger.info("✅ OpenAI Subtitle Service initialized")
+        return service
+    except Exception as e:
+        # Not cached, so the next call retries initialization
+        logger.error(f"❌ Failed to initialize OpenAI Subtitle Service: {str(e)}")
+        raise
@@ -1,18 +1,25 @@
 import asyncio
 import logging
 import time
-from typing import Dict, Any, Optional
+import threading
+from typing import Dict, Any, Optional, List, Tuple, NamedTuple
 from datetime import datetime, timedelta
 import psutil
 import os
 
 logger = logging.getLogger(__name__)
 
+class ProcessScan(NamedTuple):
+    """Result of a single pass over the tracked processes"""
+    hanging: Dict[str, Dict[str, Any]]
+    stats: Dict[str, Any]
+
 class ProcessMonitor:
     """Monitor for detecting and handling hanging processes"""
     
     def __init__(self):
         self.active_processes: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
         self.process_timeouts = {
             'transcription': 300,  # 5 minutes
             'video_processing': 600,  # 10 minutes
@@ -20,41 +27,102 @@ class ProcessMonitor:
             'ai_analysis': 180,  # 3 minutes
             'caption_processing': 180,  # 3 minutes
         }
+        
+        # System resources are sampled by a background thread so health checks
+        # never block on psutil (cpu_percent with an interval sleeps)
+        self.RESOURCE_SAMPLE_INTERVAL = 2  # seconds
+        self._last_sample: Optional[Dict[str, Any]] = None
+        psutil.cpu_percent(interval=None)  # Prime the CPU counter
+        self._sampler_thread = threading.Thread(
+            target=self._sampler, name="process-monitor-sampler", daemon=True
+        )
+        self._sampler_thread.start()
+        
         logger.info("🔍 Process Monitor initialized")
     
+    def _sample_system_resources(self) -> Dict[str, Any]:
+        """Take a non-blocking reading of system resource usage"""
+        return {
+            'cpu_percent': psutil.cpu_percent(interval=None),
+            'memory_percent': psutil.virtual_memory().percent,
+            'disk_percent': psutil.disk_usage('/').percent,
+            'process_count': len(psutil.pids()),
+            'sampled_at': time.time()
+        }
+    
+    def _sampler(self):
+        """Background loop refreshing the cached resource sample"""
+        while True:
+            try:
+                self._last_sample = self._sample_system_resources()
+            except Exception as e:
+                logger.error(f"❌ Error sampling system resources: {str(e)}")
+            time.sleep(self.RESOURCE_SAMPLE_INTERVAL)
+    
     def start_process_tracking(self, process_id: str, process_type: str, metadata: Optional[Dict] = None):
         """Start tracking a process"""
-        self.active_processes[process_id] = {
+        now = time.time()
+        process_info = {
             'type': process_type,
-            'start_time': time.time(),
+            'start_time': now,
             'timeout': self.process_timeouts.get(process_type, 300),
             'metadata': metadata or {},
-            'last_heartbeat': time.time(),
+            'last_heartbeat': now,
             'status': 'running'
         }
+        with self._lock:
+            self.active_processes[process_id] = process_info
         logger.info(f"🔍 Started tracking {process_type} process: {process_id}")
     
     def update_process_heartbeat(self, process_id: str):
         """Update process heartbeat to indicate it's still alive"""
-        if process_id in self.active_processes:
-            self.active_processes[process_id]['last_heartbeat'] = time.time()
+        with self._lock:
+            process_info = self.active_processes.get(process_id)
+            if process_info is not None:
+                process_info['last_heartbeat'] = time.time()
+        if process_info is not None:
             logger.debug(f"💓 Heartbeat updated for process: {process_id}")
     
     def stop_process_tracking(self, process_id: str):
         """Stop tracking a process"""
-        if process_id in self.active_processes:
-            process_info = self.active_processes.pop(process_id)
+        with self._lock:
+            process_info = self.active_processes.pop(process_id, None)
+        if process_info is not None:
             duration = time.time() - process_info['start_time']
             logger.info(f"✅ Stopped tracking {process_info['type']} process: {process_id} (duration: {duration:.1f}s)")
     
-    def get_hanging_processes(self) -> Dict[str, Dict[str, Any]]:
-        """Get list of processes that appear to be hanging"""
+    def _snapshot(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """Copy the tracked processes under the lock so callers can iterate lock-free"""
+        with self._lock:
+            return [(process_id, dict(info)) for process_id, info in self.active_processes.items()]
+    
+    def _scan(self, current_time: Optional[float] = None) -> ProcessScan:
+        """Collect hanging processes and process statistics in a single pass"""
+        if current_time is None:
+            current_time = time.time()
+        
         hanging = {}
-        current_time = time.time()
+        process_types: Dict[str, int] = {}
+        total_duration = 0.0
+        longest_process = None
         
-        for process_id, info in self.active_processes.items():
+        snapshot = self._snapshot()
+        for process_id, info in snapshot:
+            process_type = info['type']
             elapsed = current_time - info['start_time']
             heartbeat_age = current_time - info['last_heartbeat']
+            total_duration += elapsed
+            
+            # Track by type
+            process_types[process_type] = process_types.get(process_type, 0) + 1
+            
+            # Track longest running
+            if longest_process is None or elapsed > longest_process['duration']:
+                longest_process = {
+                    'process_id': process_id,
+                    'type': process_type,
+                    'duration': elapsed
+                }
             
             # Consider hanging if:
             # 1. Process has exceeded its timeout
@@ -68,24 +136,28 @@ class ProcessMonitor:
                     'is_stale': heartbeat_age > 60
                 }
         
-        return hanging
+        stats = {
+            'active_processes': len(snapshot),
+            'process_types': process_types,
+            'longest_running': longest_process,
+            'average_duration': total_duration / len(snapshot) if snapshot else 0
+        }
+        
+        return ProcessScan(hanging=hanging, stats=stats)
+    
+    def get_hanging_processes(self) -> Dict[str, Dict[str, Any]]:
+        """Get list of processes that appear to be hanging"""
+        return self._scan().hanging
     
     async def check_system_resources(self) -> Dict[str, Any]:
         """Check system resource usage"""
         try:
-            # CPU usage
-            cpu_percent = psutil.cpu_percent(interval=1)
-            
-            # Memory usage
-            memory = psutil.virtual_memory()
-            memory_percent = memory.percent
-            
-            # Disk usage
-            disk = psutil.disk_usage('/')
-            disk_percent = disk.percent
-            
-            # Process count
-            process_count = len(psutil.pids())
+            # Use the latest background sample; only sample inline before the first one lands
+            sample = self._last_sample or await asyncio.to_thread(self._sample_system_resources)
+            cpu_percent = sample['cpu_percent']
+            memory_percent = sample['memory_percent']
+            disk_percent = sample['disk_percent']
+            process_count = sample['process_count']
             
             # Check for high resource usage
             alerts = []
@@ -140,44 +212,7 @@ class ProcessMonitor:
     
     def get_process_stats(self) -> Dict[str, Any]:
         """Get statistics about tracked processes"""
-        current_time = time.time()
-        stats = {
-            'active_processes': len(self.active_processes),
-            'process_types': {},
-            'longest_running': None,
-            'average_duration': 0
-        }
-        
-        if not self.active_processes:
-            return stats
-        
-        durations = []
-        longest_duration = 0
-        longest_process = None
-        
-        for process_id, info in self.active_processes.items():
-            process_type = info['type']
-            duration = current_time - info['start_time']
-            durations.append(duration)
-            
-            # Track by type
-            if process_type not in stats['process_types']:
-                stats['process_types'][process_type] = 0
-            stats['process_types'][process_type] += 1
-            
-            # Track longest running
-            if duration > longest_duration:
-                longest_duration = duration
-                longest_process = {
-                    'process_id': process_id,
-                    'type': process_type,
-                    'duration': duration
-                }
-        
-        stats['longest_running'] = longest_process
-        stats['average_duration'] = sum(durations) / len(durations) if durations else 0
-        
-        return stats
+        return self._scan().stats
 
 # Global process monitor instance
 process_monitor = ProcessMonitor()
\ No newline at end of file
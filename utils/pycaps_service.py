@@ -1,13 +1,69 @@
 import os
 import logging
 import asyncio
-import ffmpeg
-import tempfile
-from typing import Optional, List
+import shutil
+import numpy as np
+from types import MappingProxyType
+from typing import List, Mapping
 from .models import CaptionStyle
 
 logger = logging.getLogger(__name__)
 
+_FONTS_DIR = os.getenv('FONTS_DIR', 'fonts')
+
+# FFmpeg caption style configurations, built once at import and shared read-only
+_CAPTION_STYLES: Mapping[CaptionStyle, dict] = MappingProxyType({
+    CaptionStyle.HYPE: {
+        'fontsize': 48,
+        'fontcolor': 'FFFFFF',  # White
+        'box': 1,
+        'boxcolor': '000000@0.8',  # Black with alpha
+        'boxborderw': 8,
+        'fontfile': os.path.join(_FONTS_DIR, 'arial.ttf'),  # Specify default font file
+        'bold': 1,
+        'shadow': 1,
+        'shadowcolor': '000000',  # Black
+        'shadowx': 2,
+        'shadowy': 2
+    },
+    CaptionStyle.VIBRANT: {
+        'fontsize': 44,
+        'fontcolor': 'FFFF00',  # Yellow
+        'box': 1,
+        'boxcolor': '800080@0.7',  # Purple with alpha
+        'boxborderw': 6,
+        'fontfile': None,
+        'bold': 1,
+        'shadow': 1,
+        'shadowcolor': '000000',  # Black
+        'shadowx': 3,
+        'shadowy': 3
+    },
+    CaptionStyle.NEO_MINIMAL: {
+        'fontsize': 36,
+        'fontcolor': 'FFFFFF',  # White
+        'box': 1,
+        'boxcolor': '000000@0.5',  # Black with alpha
+        'boxborderw': 2,
+        'fontfile': None,
+        'bold': 0,
+        'shadow': 0
+    },
+    CaptionStyle.LINE_FOCUS: {
+        'fontsize': 40,
+        'fontcolor': 'FFFFFF',  # White
+        'box': 1,
+        'boxcolor': 'FF0000@0.8',  # Red with alpha
+        'boxborderw': 4,
+        'fontfile': None,
+        'bold': 1,
+        'shadow': 1,
+        'shadowcolor': '000000',  # Black
+        'shadowx': 2,
+        'shadowy': 2
+    }
+})
+
 class PyCapsService:
     """Caption service for adding captions to videos using FFmpeg"""
     
@@ -18,58 +74,7 @@ class PyCapsService:
     
     def _get_caption_style_config(self, caption_style: CaptionStyle) -> dict:
         """Get FFmpeg caption style configuration"""
-        styles = {
-            CaptionStyle.HYPE: {
-                'fontsize': 48,
-                'fontcolor': 'FFFFFF',  # White
-                'box': 1,
-                'boxcolor': '000000@0.8',  # Black with alpha
-                'boxborderw': 8,
-                'fontfile': os.path.join(os.getenv('FONTS_DIR', 'fonts'), 'arial.ttf'),  # Specify default font file
-                'bold': 1,
-                'shadow': 1,
-                'shadowcolor': '000000',  # Black
-                'shadowx': 2,
-                'shadowy': 2
-            },
-            CaptionStyle.VIBRANT: {
-                'fontsize': 44,
-                'fontcolor': 'FFFF00',  # Yellow
-                'box': 1,
-                'boxcolor': '800080@0.7',  # Purple with alpha
-                'boxborderw': 6,
-                'fontfile': None,
-                'bold': 1,
-                'shadow': 1,
-                'shadowcolor': '000000',  # Black
-                'shadowx': 3,
-                'shadowy': 3
-            },
-            CaptionStyle.NEO_MINIMAL: {
-                'fontsize': 36,
-                'fontcolor': 'FFFFFF',  # White
-                'box': 1,
-                'boxcolor': '000000@0.5',  # Black with alpha
-                'boxborderw': 2,
-                'fontfile': None,
-                'bold': 0,
-                'shadow': 0
-            },
-            CaptionStyle.LINE_FOCUS: {
-                'fontsize': 40,
-                'fontcolor': 'FFFFFF',  # White
-                'box': 1,
-                'boxcolor': 'FF0000@0.8',  # Red with alpha
-                'boxborderw': 4,
-                'fontfile': None,
-                'bold': 1,
-                'shadow': 1,
-                'shadowcolor': '000000',  # Black
-                'shadowx': 2,
-                'shadowy': 2
-            }
-        }
-        return styles.get(caption_style, styles[CaptionStyle.HYPE])
+        return _CAPTION_STYLES.get(caption_style, _CAPTION_STYLES[CaptionStyle.HYPE])
     
     async def add_captions_to_video(
         self, 
@@ -85,8 +90,7 @@ class PyCapsService:
             # since we don't have transcription data available in this service
             # The captions should be added in the video processor where transcription data is available
             
-            import shutil
-            shutil.copy2(input_video, output_video)
+            await asyncio.to_thread(shutil.copy2, input_video, output_video)
             logger.info("📝 Video copied (captions will be added in video processor)")
             
             return True
@@ -98,14 +102,19 @@ class PyCapsService:
     def create_subtitle_file(self, transcription_segments: List, output_path: str) -> bool:
         """Create SRT subtitle file from transcription segments"""
         try:
-            with open(output_path, 'w', encoding='utf-8') as f:
-                for i, segment in enumerate(transcription_segments, 1):
-                    start_time = self._seconds_to_srt_time(segment.start)
-                    end_time = self._seconds_to_srt_time(segment.end)
-                    
-                    f.write(f"{i}\n")
-                    f.write(f"{start_time} --> {end_time}\n")
-                    f.write(f"{segment.text.strip()}\n\n")
+            # Convert all timestamps in one vectorized pass
+            start_times = self._seconds_to_srt_times([segment.start for segment in transcription_segments])
+            end_times = self._seconds_to_srt_times([segment.end for segment in transcription_segments])
+            
+            srt_content = "".join([
+                f"{i}\n{start_time} --> {end_time}\n{segment.text.strip()}\n\n"
+                for i, (segment, start_time, end_time) in enumerate(
+                    zip(transcription_segments, start_times, end_times), 1
+                )
+            ])
+            
+            with open(output_path, 'w', encoding='utf-8', buffering=1 << 20) as f:
+                f.write(srt_content)
             
             logger.info(f"✅ Created subtitle file: {output_path}")
             return True
@@ -122,3 +131,18 @@ class PyCapsService:
         milliseconds = int((seconds % 1) * 1000)
         
         return f"{hours:02d}:{minutes:02d}:{secs:02d},{milliseconds:03d}"
+    
+    def _seconds_to_srt_times(self, seconds: List[float]) -> List[str]:
+        """Convert a batch of seconds to SRT time format (HH:MM:SS,mmm) using NumPy"""
+        # Work in integer milliseconds so every field is exact integer division; round first,
+        # since values like 2.01 * 1000 land just below the exact millisecond
+        total_ms = np.rint(np.asarray(seconds, dtype=np.float64) * 1000).astype(np.int64)
+        hours = total_ms // 3_600_000
+        minutes = (total_ms // 60_000) % 60
+        secs = (total_ms // 1000) % 60
+        milliseconds = total_ms % 1000
+        
+        return [
+            f"{h:02d}:{m:02d}:{s:02d},{ms:03d}"
+            for h, m, s, ms in zip(hours.tolist(), minutes.tolist(), secs.tolist(), milliseconds.tolist())
+        ]
@@ -1,17 +1,62 @@
 import os
 import logging
 import asyncio
-from typing import Optional, Dict, List
+import time
+import shutil
+import threading
+from collections import OrderedDict
+from types import MappingProxyType
+from typing import Optional, Dict, List, AsyncIterator, Tuple, Mapping
 from supabase import create_client, Client
+from postgrest.exceptions import APIError
+import httpx
 from dotenv import load_dotenv
 import aiofiles
+import aiofiles.os
 from pathlib import Path
 
+try:
+    import h2  # noqa: F401 - enables HTTP/2 in httpx
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Sequential read-ahead hints are Linux/POSIX only
+FADVISE_AVAILABLE = hasattr(os, "posix_fadvise")
+
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# Content types for the files we upload, keyed by lowercase extension
+_CT_BY_EXT: Mapping[str, str] = MappingProxyType({
+    ".mp4": "video/mp4",
+    ".mov": "video/quicktime",
+    ".jpg": "image/jpeg",
+    ".png": "image/png",
+})
+
+# Shared, read-only upload options so retries don't rebuild them
+_CLIP_OPTS: Mapping[str, str] = MappingProxyType({"content-type": _CT_BY_EXT[".mp4"], "upsert": "true"})
+_THUMB_OPTS: Mapping[str, str] = MappingProxyType({"content-type": _CT_BY_EXT[".jpg"], "upsert": "true"})
+
 class StorageManager:
+    UPLOAD_CHUNK_SIZE = 4 * 1024 * 1024  # 4 MiB
+    
+    # Signed URL expiries and how long before expiry a cached URL is dropped
+    CLIP_URL_EXPIRY = 3600  # 1 hour
+    STREAM_URL_EXPIRY = 14400  # 4 hours
+    URL_CACHE_MARGIN = 300  # 5 minutes
+    URL_CACHE_MAX_SIZE = 4096
+    UPLOAD_WORKERS = 4
+    MAX_UPLOADS = int(os.getenv("MAX_UPLOADS", 4))
+    
+    # Upload retry policy: other 4xx responses (auth, quota, too large) are permanent
+    RETRYABLE_STATUS_CODES = frozenset({408, 425, 429, 500, 502, 503, 504})
+    UPLOAD_MAX_RETRIES = 5
+    UPLOAD_BASE_DELAY = 2  # seconds, doubled per attempt
+    MAX_RETRY_AFTER = 60  # seconds
+    
     def __init__(self):
         # Initialize Supabase client
         supabase_url = os.getenv("SUPABASE_URL")
@@ -23,10 +68,117 @@ class StorageManager:
         try:
             self.supabase: Client = create_client(supabase_url, supabase_key)
             self.bucket_name = "user-clips"
+            
+            self._storage_url = f"{supabase_url.rstrip('/')}/storage/v1"
+            self._storage_headers = {"apikey": supabase_key, "Authorization": f"Bearer {supabase_key}"}
             logger.info("✅ Storage Manager initialized with Supabase")
         except Exception as e:
             logger.error(f"❌ Failed to initialize Storage Manager: {str(e)}")
             raise e
+        
+        # Signed URL cache: (storage_path, expires_in) -> (url, created_at)
+        self._url_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._url_cache_lock = threading.Lock()
+        
+        # Pooled upload client and transfer cap, one pair per event loop: jobs run on their own
+        # short-lived loops and neither connections nor semaphores can be shared across them
+        self._loop_pools: Dict[asyncio.AbstractEventLoop, Tuple[httpx.AsyncClient, asyncio.Semaphore]] = {}
+        self._loop_pools_lock = threading.Lock()
+    
+    def _get_cached_url(self, storage_path: str, expires_in: int) -> Optional[str]:
+        """Return a cached signed URL that is still comfortably within its expiry"""
+        key = (storage_path, expires_in)
+        with self._url_cache_lock:
+            entry = self._url_cache.get(key)
+            if entry is None:
+                return None
+            url, created_at = entry
+            if time.monotonic() - created_at >= expires_in - self.URL_CACHE_MARGIN:
+                del self._url_cache[key]
+                return None
+            self._url_cache.move_to_end(key)
+            return url
+    
+    def _cache_url(self, storage_path: str, expires_in: int, url: str):
+        """Store a freshly signed URL, evicting the least recently used entry"""
+        key = (storage_path, expires_in)
+        with self._url_cache_lock:
+            self._url_cache[key] = (url, time.monotonic())
+            self._url_cache.move_to_end(key)
+            if len(self._url_cache) > self.URL_CACHE_MAX_SIZE:
+                self._url_cache.popitem(last=False)
+    
+    def _invalidate_urls(self, storage_path: str):
+        """Drop cached signed URLs for a storage path"""
+        with self._url_cache_lock:
+            for expires_in in (self.CLIP_URL_EXPIRY, self.STREAM_URL_EXPIRY):
+                self._url_cache.pop((storage_path, expires_in), None)
+    
+    def _loop_pool(self) -> Tuple[httpx.AsyncClient, asyncio.Semaphore]:
+        """Pooled upload client and upload semaphore for the running event loop"""
+        loop = asyncio.get_running_loop()
+        with self._loop_pools_lock:
+            # Pools of loops that closed without calling close() can't be reused, only dropped
+            for stale_loop in [owner for owner in self._loop_pools if owner.is_closed()]:
+                del self._loop_pools[stale_loop]
+            
+            pool = self._loop_pools.get(loop)
+            if pool is None:
+                pool = self._loop_pools[loop] = (
+                    # One client per loop so TLS handshakes are reused and a job's concurrent uploads multiplex over HTTP/2
+                    httpx.AsyncClient(
+                        base_url=self._storage_url,
+                        http2=HTTP2_AVAILABLE,
+                        headers=self._storage_headers,
+                        limits=httpx.Limits(max_keepalive_connections=32),
+                        timeout=httpx.Timeout(300.0, connect=10.0)
+                    ),
+                    # Caps in-flight transfers; retries wait for backoff outside the semaphore
+                    asyncio.Semaphore(self.MAX_UPLOADS)
+                )
+            return pool
+    
+    async def close(self):
+        """Close the pooled HTTP client owned by the running event loop"""
+        with self._loop_pools_lock:
+            pool = self._loop_pools.pop(asyncio.get_running_loop(), None)
+        if pool is not None:
+            await pool[0].aclose()
+            logger.info("🔌 Storage Manager HTTP client closed")
+    
+    async def _iter_file(self, local_file_path: str) -> AsyncIterator[bytes]:
+        """Yield a local file in fixed-size chunks"""
+        async with aiofiles.open(local_file_path, 'rb') as file:
+            if FADVISE_AVAILABLE:
+                # Let the kernel read ahead aggressively so worker-thread reads hit the page cache
+                try:
+                    os.posix_fadvise(file.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+                except OSError:
+                    pass
+            while True:
+                chunk = await file.read(self.UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+    
+    async def _upload_file(self, storage_path: str, local_file_path: str, file_options: Mapping[str, str]) -> Dict:
+        """Upload a local file straight to the Storage REST API as a streamed raw body"""
+        headers = {
+            "content-type": file_options["content-type"],
+            "x-upsert": file_options.get("upsert", "false"),
+            "content-length": str(await aiofiles.os.path.getsize(local_file_path))
+        }
+        
+        client, upload_sem = self._loop_pool()
+        async with upload_sem:
+            response = await client.post(
+                f"/object/{self.bucket_name}/{storage_path}",
+                content=self._iter_file(local_file_path),
+                headers=headers
+            )
+        
+        response.raise_for_status()
+        return response.json()
     
     async def upload_thumbnail(self, user_id: str, local_file_path: str, thumbnail_filename: str) -> Optional[str]:
         """Upload a thumbnail file to Supabase Storage"""
@@ -36,16 +188,8 @@ class StorageManager:
             
             logger.info(f"🖼️ Uploading thumbnail to storage: {storage_path}")
             
-            # Read file content
-            async with aiofiles.open(local_file_path, 'rb') as file:
-                file_content = await file.read()
-            
-            # Upload to Supabase Storage
-            response = self.supabase.storage.from_(self.bucket_name).upload(
-                path=storage_path,
-                file=file_content,
-                file_options={"content-type": "image/jpeg", "upsert": "true"}
-            )
+            # Upload to Supabase Storage, streaming from disk
+            response = await self._upload_file(storage_path, local_file_path, _THUMB_OPTS)
             
             # Check if upload was successful
             if hasattr(response, 'error') and response.error:
@@ -59,6 +203,18 @@ class StorageManager:
             logger.error(f"❌ Error uploading thumbnail: {str(e)}")
             return None
     
+    def _retry_delay(self, error: Exception, attempt: int) -> Optional[float]:
+        """Seconds to wait before retrying a failed upload, or None if the failure is permanent"""
+        if isinstance(error, httpx.HTTPStatusError):
+            if error.response.status_code not in self.RETRYABLE_STATUS_CODES:
+                return None
+            retry_after = error.response.headers.get("retry-after", "")
+            if retry_after.isdigit():
+                return min(float(retry_after), self.MAX_RETRY_AFTER)
+        elif not isinstance(error, (httpx.TransportError, ConnectionError)):
+            return None
+        return self.UPLOAD_BASE_DELAY * (2 ** attempt)
+    
     async def upload_clip(self, user_id: str, local_file_path: str, clip_filename: str) -> Optional[str]:
         """Upload a clip file to Supabase Storage"""
         try:
@@ -67,58 +223,34 @@ class StorageManager:
             
             logger.info(f"📤 Uploading clip to storage: {storage_path}")
             
-            # Read file content
-            async with aiofiles.open(local_file_path, 'rb') as file:
-                file_content = await file.read()
-            
-            # Upload to Supabase Storage with retry logic and exponential backoff
-            max_retries = 5
-            base_delay = 2  # Start with 2 seconds
+            # Upload with exponential backoff, retrying only transient failures
+            max_retries = self.UPLOAD_MAX_RETRIES
             
             for attempt in range(max_retries):
                 try:
-                    print(f"🔄 Upload attempt {attempt + 1}/{max_retries} for {storage_path}")
+                    logger.debug("🔄 Upload attempt %s/%s for %s", attempt + 1, max_retries, storage_path)
                     
-                    response = self.supabase.storage.from_(self.bucket_name).upload(
-                        path=storage_path,
-                        file=file_content,
-                        file_options={"content-type": "video/mp4", "upsert": "true"}
-                    )
+                    # Streamed from disk on every attempt so nothing is held in memory between retries
+                    await self._upload_file(storage_path, local_file_path, _CLIP_OPTS)
                     
-                    # Check if upload was successful
-                    if hasattr(response, 'error') and response.error:
-                        logger.error(f"❌ Supabase upload error (attempt {attempt + 1}): {response.error}")
-                        if attempt < max_retries - 1:
-                            delay = base_delay * (2 ** attempt)  # Exponential backoff
-                            print(f"⏳ Waiting {delay}s before retry...")
-                            await asyncio.sleep(delay)
-                            continue
-                        return None
-                    else:
-                        logger.info(f"✅ Successfully uploaded clip: {storage_path}")
-                        print(f"✅ Upload successful on attempt {attempt + 1}")
-                        return storage_path
+                    logger.info(f"✅ Successfully uploaded clip: {storage_path}")
+                    logger.debug("✅ Upload successful on attempt %s", attempt + 1)
+                    return storage_path
                         
                 except Exception as upload_error:
                     error_msg = str(upload_error)
                     logger.error(f"❌ Upload attempt {attempt + 1} failed: {error_msg}")
-                    print(f"❌ Upload attempt {attempt + 1} failed: {error_msg}")
                     
-                    # Check if it's a network-related error
-                    if "Broken pipe" in error_msg or "Connection" in error_msg:
-                        if attempt < max_retries - 1:
-                            delay = base_delay * (2 ** attempt)  # Exponential backoff
-                            print(f"🔌 Network error detected. Waiting {delay}s before retry...")
-                            await asyncio.sleep(delay)
-                            continue
+                    delay = self._retry_delay(upload_error, attempt)
+                    if delay is None:
+                        logger.error(f"❌ Non-retryable upload error for {storage_path}, giving up")
+                        return None
                     
                     if attempt == max_retries - 1:
                         raise upload_error
                     
-                    # Wait before next attempt
-                    delay = base_delay * (2 ** attempt)
+                    logger.debug("⏳ Waiting %ss before retry...", delay)
                     await asyncio.sleep(delay)
-                    continue
                     
         except Exception as e:
             logger.error(f"❌ Error uploading clip: {str(e)}")
@@ -133,7 +265,7 @@ class StorageManager:
             if storage_path:
                 # Immediately delete local file to save disk space
                 try:
-                    os.remove(local_file_path)
+                    await aiofiles.os.remove(local_file_path)
                     logger.info(f"🗑️ Deleted local clip file: {local_file_path}")
                 except Exception as cleanup_error:
                     logger.warning(f"⚠️ Failed to delete local file {local_file_path}: {str(cleanup_error)}")
@@ -156,7 +288,7 @@ class StorageManager:
             if storage_path:
                 # Immediately delete local file to save disk space
                 try:
-                    os.remove(local_file_path)
+                    await aiofiles.os.remove(local_file_path)
                     logger.info(f"🗑️ Deleted local thumbnail file: {local_file_path}")
                 except Exception as cleanup_error:
                     logger.warning(f"⚠️ Failed to delete local thumbnail file {local_file_path}: {str(cleanup_error)}")
@@ -170,24 +302,66 @@ class StorageManager:
             logger.error(f"❌ Error in upload_and_cleanup_thumbnail: {str(e)}")
             return None
     
+    async def upload_clip_bundle(
+        self,
+        user_id: str,
+        clip_path: str,
+        clip_filename: str,
+        thumbnail_path: Optional[str] = None,
+        thumbnail_filename: Optional[str] = None
+    ) -> Tuple[Optional[str], Optional[str]]:
+        """Upload a clip and its thumbnail concurrently, deleting each local file once uploaded"""
+        if not thumbnail_path or not thumbnail_filename:
+            return await self.upload_and_cleanup_clip(user_id, clip_path, clip_filename), None
+        
+        clip_storage_path, thumbnail_storage_path = await asyncio.gather(
+            self.upload_and_cleanup_clip(user_id, clip_path, clip_filename),
+            self.upload_and_cleanup_thumbnail(user_id, thumbnail_path, thumbnail_filename)
+        )
+        return clip_storage_path, thumbnail_storage_path
+    
+    async def upload_clip_bundles(
+        self,
+        bundles: List[Tuple[str, str, str, Optional[str], Optional[str]]]
+    ) -> List[Tuple[Optional[str], Optional[str]]]:
+        """Upload several clip bundles on the calling event loop, a few at a time, returning their storage paths in order"""
+        # Created per call so it belongs to the job's own event loop
+        bundle_sem = asyncio.Semaphore(self.UPLOAD_WORKERS)
+        
+        async def _upload(bundle):
+            async with bundle_sem:
+                try:
+                    return await self.upload_clip_bundle(*bundle)
+                except Exception as e:
+                    logger.error(f"❌ Error uploading clip bundle {bundle[2]}: {str(e)}")
+                    return None, None
+        
+        return await asyncio.gather(*(_upload(bundle) for bundle in bundles))
+    
+    def _clip_record(self, user_id: str, job_id: str, clip_data: Dict) -> Dict:
+        """Build a user_clips row from clip metadata"""
+        return {
+            "user_id": user_id,
+            "job_id": job_id,
+            "filename": clip_data["filename"],
+            "title": clip_data.get("title", "Untitled Clip"),
+            "duration": clip_data.get("duration", 0),
+            "file_size": clip_data.get("file_size", 0),
+            "storage_path": clip_data["storage_path"],
+            "thumbnail_path": clip_data.get("thumbnail_path"),
+            "hook_title": clip_data.get("hook_title"),
+            "viral_potential": clip_data.get("viral_potential")
+        }
+    
     async def save_clip_metadata(self, user_id: str, job_id: str, clip_data: Dict) -> bool:
         """Save clip metadata to the database"""
         try:
-            clip_record = {
-                "user_id": user_id,
-                "job_id": job_id,
-                "filename": clip_data["filename"],
-                "title": clip_data.get("title", "Untitled Clip"),
-                "duration": clip_data.get("duration", 0),
-                "file_size": clip_data.get("file_size", 0),
-                "storage_path": clip_data["storage_path"],
-                "thumbnail_path": clip_data.get("thumbnail_path"),
-                "hook_title": clip_data.get("hook_title"),
-                "viral_potential": clip_data.get("viral_potential")
-            }
+            clip_record = self._clip_record(user_id, job_id, clip_data)
             
             logger.info(f"💾 Saving clip metadata: {clip_record}")
-            response = self.supabase.table("user_clips").insert(clip_record).execute()
+            response = await asyncio.to_thread(
+                self.supabase.table("user_clips").insert(clip_record).execute
+            )
             
             if response.data:
                 logger.info(f"✅ Saved clip metadata for {clip_data['filename']}")
@@ -200,13 +374,50 @@ class StorageManager:
             logger.error(f"❌ Error saving clip metadata: {str(e)}")
             return False
     
-    async def get_user_clips(self, user_id: str) -> List[Dict]:
-        """Get all clips for a user"""
+    async def save_clip_metadata_batch(self, user_id: str, job_id: str, clips: List[Dict]) -> List[str]:
+        """Save metadata for all of a job's clips in one insert, returning the saved filenames"""
+        if not clips:
+            return []
+        
+        try:
+            records = [self._clip_record(user_id, job_id, clip_data) for clip_data in clips]
+            
+            logger.info(f"💾 Saving metadata for {len(records)} clips of job {job_id}")
+            response = await asyncio.to_thread(
+                self.supabase.table("user_clips").insert(records).execute
+            )
+            
+            if response.data:
+                logger.info(f"✅ Saved clip metadata for {len(response.data)} clips")
+                return [record["filename"] for record in records]
+            logger.error(f"❌ Failed to save clip metadata batch: {response}")
+            
+        except (APIError, KeyError) as e:
+            # Rejected by the database, or a record couldn't be built: nothing was written
+            logger.error(f"❌ Error saving clip metadata batch: {str(e)}")
+        except Exception as e:
+            # Timeouts and dropped connections may hide a committed insert, and retrying
+            # row by row would then list every clip twice
+            logger.error(f"❌ Clip metadata batch for job {job_id} has an unknown outcome, not retrying: {str(e)}")
+            return []
+        
+        # The bulk insert is all-or-nothing; fall back to per-clip inserts so one bad row doesn't drop the job
+        saved = await asyncio.gather(
+            *(self.save_clip_metadata(user_id, job_id, clip_data) for clip_data in clips)
+        )
+        return [clip_data["filename"] for clip_data, ok in zip(clips, saved) if ok]
+    
+    async def get_user_clips(self, user_id: str, include_urls: bool = False) -> List[Dict]:
+        """Get all clips for a user, optionally with signed stream/thumbnail URLs attached"""
         try:
-            response = self.supabase.table("user_clips").select("*").eq("user_id", user_id).order("created_at", desc=True).execute()
+            response = await asyncio.to_thread(
+                self.supabase.table("user_clips").select("*").eq("user_id", user_id).order("created_at", desc=True).execute
+            )
             
             if response.data:
                 logger.info(f"📋 Retrieved {len(response.data)} clips for user {user_id}")
+                if include_urls:
+                    await self.add_signed_urls(response.data)
                 return response.data
             else:
                 logger.info(f"📋 No clips found for user {user_id}")
@@ -216,16 +427,66 @@ class StorageManager:
             logger.error(f"❌ Error getting user clips: {str(e)}")
             return []
     
+    async def add_signed_urls(self, clips: List[Dict]) -> List[Dict]:
+        """Attach 'stream_url'/'thumbnail_url' to clip rows, signing all uncached paths in one request"""
+        paths = {
+            clip[field]
+            for clip in clips
+            for field in ('storage_path', 'thumbnail_path')
+            if clip.get(field)
+        }
+        
+        urls = {}
+        missing = []
+        for path in paths:
+            cached_url = self._get_cached_url(path, self.CLIP_URL_EXPIRY)
+            if cached_url:
+                urls[path] = cached_url
+            else:
+                missing.append(path)
+        
+        if missing:
+            try:
+                response = await asyncio.to_thread(
+                    self.supabase.storage.from_(self.bucket_name).create_signed_urls,
+                    missing,
+                    self.CLIP_URL_EXPIRY
+                )
+                for item in response:
+                    if item.get('signedURL') and not item.get('error'):
+                        urls[item['path']] = item['signedURL']
+                        self._cache_url(item['path'], self.CLIP_URL_EXPIRY, item['signedURL'])
+                logger.info(f"🔗 Signed {len(missing)} URLs in one request")
+            except Exception as e:
+                # The batch fails as a whole if any path is missing; sign individually instead
+                logger.warning(f"⚠️ Batch URL signing failed, signing individually: {str(e)}")
+                signed = await asyncio.gather(*(asyncio.to_thread(self.get_clip_url, path) for path in missing))
+                urls.update(zip(missing, signed))
+        
+        for clip in clips:
+            if clip.get('storage_path'):
+                clip['stream_url'] = urls.get(clip['storage_path'], "")
+            if clip.get('thumbnail_path'):
+                clip['thumbnail_url'] = urls.get(clip['thumbnail_path'], "")
+        
+        return clips
+    
     async def get_clip_stream_url(self, storage_path: str) -> str:
         """Get a signed URL for streaming a clip (longer expiry for video streaming)"""
+        cached_url = self._get_cached_url(storage_path, self.STREAM_URL_EXPIRY)
+        if cached_url:
+            return cached_url
+        
         try:
             # Create a signed URL that expires in 4 hours for video streaming
-            response = self.supabase.storage.from_(self.bucket_name).create_signed_url(
+            response = await asyncio.to_thread(
+                self.supabase.storage.from_(self.bucket_name).create_signed_url,
                 path=storage_path,
-                expires_in=14400  # 4 hours
+                expires_in=self.STREAM_URL_EXPIRY
             )
             
             if response.get('signedURL'):
+                self._cache_url(storage_path, self.STREAM_URL_EXPIRY, response['signedURL'])
                 return response['signedURL']
             else:
                 logger.error(f"❌ Failed to create signed URL for {storage_path}")
@@ -237,14 +498,19 @@ class StorageManager:
     
     def get_clip_url(self, storage_path: str) -> str:
         """Get a signed URL for accessing a clip"""
+        cached_url = self._get_cached_url(storage_path, self.CLIP_URL_EXPIRY)
+        if cached_url:
+            return cached_url
+        
         try:
             # Create a signed URL that expires in 1 hour
             response = self.supabase.storage.from_(self.bucket_name).create_signed_url(
                 path=storage_path,
-                expires_in=3600  # 1 hour
+                expires_in=self.CLIP_URL_EXPIRY
             )
             
             if response.get('signedURL'):
+                self._cache_url(storage_path, self.CLIP_URL_EXPIRY, response['signedURL'])
                 return response['signedURL']
             else:
                 logger.error(f"❌ Failed to create signed URL for {storage_path}")
@@ -257,9 +523,8 @@ class StorageManager:
     async def cleanup_local_directory(self, directory_path: str) -> bool:
         """Clean up entire local directory and its contents"""
         try:
-            if os.path.exists(directory_path):
-                import shutil
-                shutil.rmtree(directory_path)
+            if await aiofiles.os.path.exists(directory_path):
+                await asyncio.to_thread(shutil.rmtree, directory_path, ignore_errors=True)
                 logger.info(f"🗑️ Cleaned up local directory: {directory_path}")
                 return True
             else:
@@ -273,19 +538,32 @@ class StorageManager:
         """Delete a clip and its metadata"""
         try:
             # First get the clip metadata
-            response = self.supabase.table("user_clips").select("storage_path").eq("id", clip_id).eq("user_id", user_id).execute()
+            response = await asyncio.to_thread(
+                self.supabase.table("user_clips").select("storage_path").eq("id", clip_id).eq("user_id", user_id).execute
+            )
             
             if not response.data:
                 logger.warning(f"⚠️ Clip {clip_id} not found for user {user_id}")
                 return False
             
             storage_path = response.data[0]["storage_path"]
+            self._invalidate_urls(storage_path)
             
-            # Delete from storage
-            storage_response = self.supabase.storage.from_(self.bucket_name).remove([storage_path])
+            # Storage object and metadata row live on independent services, so delete both at once
+            storage_response, db_response = await asyncio.gather(
+                asyncio.to_thread(
+                    self.supabase.storage.from_(self.bucket_name).remove, [storage_path]
+                ),
+                asyncio.to_thread(
+                    self.supabase.table("user_clips").delete().eq("id", clip_id).eq("user_id", user_id).execute
+                ),
+                return_exceptions=True
+            )
             
-            # Delete metadata from database
-            db_response = self.supabase.table("user_clips").delete().eq("id", clip_id).eq("user_id", user_id).execute()
+            if isinstance(db_response, Exception):
+                raise db_response
+            if isinstance(storage_response, Exception):
+                logger.warning(f"⚠️ Failed to remove {storage_path} from storage: {str(storage_response)}")
             
             if db_response.data:
                 logger.info(f"✅ Deleted clip {clip_id} for user {user_id}")
@@ -0,0 +1,128 @@
+import os
+import json
+import time
+import logging
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+import redis
+import redis.asyncio as aioredis
+from dotenv import load_dotenv
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+    orjson = None
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+_json_loads = orjson.loads if ORJSON_AVAILABLE else json.loads
+_json_dumps = orjson.dumps if ORJSON_AVAILABLE else json.dumps
+
+class StripeResponseCache:
+    """Short-lived cache for Stripe lookups, shared across workers through Redis"""
+
+    KEY_PREFIX = "stripe:"
+    LOCAL_MAX_SIZE = 10000
+    REDIS_RETRY_INTERVAL = 30  # seconds to stay on the in-memory fallback after a Redis error
+
+    def __init__(self):
+        self.redis_client = None
+        self.redis_enabled = False
+        self._redis_retry_at = 0.0
+
+        # In-process fallback when Redis is unavailable: key -> (value, expires_at)
+        self._local: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        self._init_redis()
+
+    def _init_redis(self):
+        """Create the async Redis client; connections are opened lazily on first use"""
+        try:
+            self.redis_client = aioredis.from_url(
+                os.getenv('REDIS_URL', 'redis://localhost:6379/0'),
+                socket_connect_timeout=2,
+                socket_timeout=2
+            )
+            self.redis_enabled = True
+        except Exception as redis_error:
+            logger.warning(f"⚠️ Redis unavailable for Stripe cache, using in-memory only: {redis_error}")
+            self.redis_client = None
+            self.redis_enabled = False
+
+    def _redis_usable(self) -> bool:
+        """Whether Redis is configured and not in its post-error cool-down"""
+        return self.redis_enabled and time.monotonic() >= self._redis_retry_at
+
+    def _redis_failed(self, redis_error: Exception):
+        """Back off to the in-memory fallback for a while after a Redis error"""
+        self._redis_retry_at = time.monotonic() + self.REDIS_RETRY_INTERVAL
+        logger.warning(f"⚠️ Redis cache error, using in-memory fallback for {self.REDIS_RETRY_INTERVAL}s: {redis_error}")
+
+    async def get(self, key: str) -> Optional[Any]:
+        """Return a cached JSON value, or None on a miss"""
+        key = f"{self.KEY_PREFIX}{key}"
+        if self._redis_usable():
+            try:
+                raw = await self.redis_client.get(key)
+                return _json_loads(raw) if raw is not None else None
+            except redis.RedisError as redis_error:
+                self._redis_failed(redis_error)
+
+        entry = self._local.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if time.monotonic() >= expires_at:
+            del self._local[key]
+            return None
+        return value
+
+    async def set(self, key: str, value: Any, ttl: int):
+        """Cache a JSON-serializable value for ttl seconds"""
+        key = f"{self.KEY_PREFIX}{key}"
+        if self._redis_usable():
+            try:
+                await self.redis_client.setex(key, ttl, _json_dumps(value))
+                return
+            except redis.RedisError as redis_error:
+                self._redis_failed(redis_error)
+
+        self._set_local(key, value, ttl)
+
+    async def add(self, key: str, value: Any, ttl: int) -> bool:
+        """Cache a value only if the key is not already cached; returns whether it was stored"""
+        key = f"{self.KEY_PREFIX}{key}"
+        if self._redis_usable():
+            try:
+                return bool(await self.redis_client.set(key, _json_dumps(value), ex=ttl, nx=True))
+            except redis.RedisError as redis_error:
+                self._redis_failed(redis_error)
+
+        entry = self._local.get(key)
+        if entry is not None and time.monotonic() < entry[1]:
+            return False
+        self._set_local(key, value, ttl)
+        return True
+
+    def _set_local(self, key: str, value: Any, ttl: int):
+        """Store a prefixed key in the in-memory fallback, evicting the oldest entry when full"""
+        self._local[key] = (value, time.monotonic() + ttl)
+        self._local.move_to_end(key)
+        if len(self._local) > self.LOCAL_MAX_SIZE:
+            self._local.popitem(last=False)
+
+    async def delete(self, key: str):
+        """Drop a cached value everywhere it may live"""
+        key = f"{self.KEY_PREFIX}{key}"
+        self._local.pop(key, None)
+        if self._redis_usable():
+            try:
+                await self.redis_client.delete(key)
+            except redis.RedisError as redis_error:
+                self._redis_failed(redis_error)
+
+# Global Stripe cache instance
+stripe_cache = StripeResponseCache()
@@ -0,0 +1,210 @@
+import os
+import time
+import uuid
+import logging
+import asyncio
+import functools
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+from fastapi import HTTPException
+import stripe
+import redis
+import redis.asyncio as aioredis
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+class StripeConcurrencyLimiter:
+    """Caps concurrent Stripe mutations per user, shared across workers through Redis"""
+
+    MAX_CONCURRENT = 2
+    SLOT_TTL = 30  # seconds; slots left behind by crashed requests expire after this
+    KEY_PREFIX = "stripe_inflight:"
+    REDIS_RETRY_INTERVAL = 30  # seconds to stay on the in-memory fallback after a Redis error
+
+    # Drop expired slots, then claim one if the user is under the limit
+    _ACQUIRE_SCRIPT = """
+    redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', tonumber(ARGV[1]) - tonumber(ARGV[2]))
+    if redis.call('ZCARD', KEYS[1]) < tonumber(ARGV[3]) then
+        redis.call('ZADD', KEYS[1], ARGV[1], ARGV[4])
+        redis.call('EXPIRE', KEYS[1], ARGV[2])
+        return 1
+    end
+    return 0
+    """
+
+    def __init__(self):
+        self.redis_client = None
+        self.redis_enabled = False
+        self._acquire_script = None
+        self._redis_retry_at = 0.0
+
+        # In-process fallback when Redis is unavailable: user_id -> in-flight count
+        self._local_inflight: Dict[str, int] = {}
+        self._init_redis()
+
+        logger.info(f"🚦 Stripe concurrency limiter initialized - Redis: {'✅ Enabled' if self.redis_enabled else '❌ Disabled (in-memory only)'}")
+
+    def _init_redis(self):
+        """Create the async Redis client; connections are opened lazily on first use"""
+        try:
+            redis_url = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+            self.redis_client = aioredis.from_url(
+                redis_url,
+                decode_responses=True,
+                socket_connect_timeout=2,
+                socket_timeout=2
+            )
+            self._acquire_script = self.redis_client.register_script(self._ACQUIRE_SCRIPT)
+            self.redis_enabled = True
+        except Exception as redis_error:
+            logger.warning(f"⚠️ Redis unavailable for Stripe limiter, using in-memory only: {redis_error}")
+            self.redis_client = None
+            self.redis_enabled = False
+
+    def _redis_usable(self) -> bool:
+        """Whether Redis is configured and not in its post-error cool-down"""
+        return self.redis_enabled and time.monotonic() >= self._redis_retry_at
+
+    def _redis_failed(self, redis_error: Exception):
+        """Back off to the in-memory fallback for a while after a Redis error"""
+        self._redis_retry_at = time.monotonic() + self.REDIS_RETRY_INTERVAL
+        logger.warning(f"⚠️ Redis limiter error, using in-memory fallback for {self.REDIS_RETRY_INTERVAL}s: {redis_error}")
+
+    async def _acquire(self, user_id: str, slot_id: str) -> bool:
+        """Try to claim an in-flight slot for the user"""
+        if self._redis_usable():
+            try:
+                acquired = await self._acquire_script(
+                    keys=[f"{self.KEY_PREFIX}{user_id}"],
+                    args=[time.time(), self.SLOT_TTL, self.MAX_CONCURRENT, slot_id]
+                )
+                return bool(acquired)
+            except redis.RedisError as redis_error:
+                self._redis_failed(redis_error)
+
+        inflight = self._local_inflight.get(user_id, 0)
+        if inflight >= self.MAX_CONCURRENT:
+            return False
+        self._local_inflight[user_id] = inflight + 1
+        return True
+
+    async def _release(self, user_id: str, slot_id: str):
+        """Free a previously claimed slot"""
+        if self._redis_usable():
+            try:
+                if await self.redis_client.zrem(f"{self.KEY_PREFIX}{user_id}", slot_id):
+                    return
+            except redis.RedisError as redis_error:
+                self._redis_failed(redis_error)
+
+        inflight = self._local_inflight.get(user_id, 0)
+        if inflight <= 1:
+            self._local_inflight.pop(user_id, None)
+        else:
+            self._local_inflight[user_id] = inflight - 1
+
+    @asynccontextmanager
+    async def slot(self, user_id: str):
+        """Hold one of the user's Stripe mutation slots, rejecting with 429 when all are busy"""
+        slot_id = uuid.uuid4().hex
+        if not await self._acquire(user_id, slot_id):
+            logger.warning(f"🚦 Too many concurrent billing requests for user {user_id}")
+            raise HTTPException(status_code=429, detail="Too many concurrent billing requests, please retry shortly")
+        try:
+            yield
+        finally:
+            await self._release(user_id, slot_id)
+
+def limit_stripe_mutations(endpoint):
+    """Decorate a route whose first argument has a user_id so it runs under the per-user limiter"""
+    @functools.wraps(endpoint)
+    async def wrapper(request, *args, **kwargs):
+        async with stripe_limiter.slot(request.user_id):
+            return await endpoint(request, *args, **kwargs)
+    return wrapper
+
+class AIMDConcurrencyController:
+    """Adaptive cap on concurrent outbound calls: grows additively while latency is healthy, halves on throttling"""
+
+    def __init__(
+        self,
+        c_min: int = 2,
+        c_max: int = 50,
+        initial: int = 10,
+        alpha: float = 0.5,
+        beta: float = 0.5,
+        target_latency: float = 0.4,
+        window: int = 100
+    ):
+        self.c_min = c_min
+        self.c_max = c_max
+        self.alpha = alpha
+        self.beta = beta
+        self.target_latency = target_latency
+        self.limit = float(initial)
+
+        self._inflight = 0
+        self._latencies = deque(maxlen=window)
+        self._condition: Optional[asyncio.Condition] = None
+
+    @asynccontextmanager
+    async def slot(self):
+        """Wait until the current concurrency limit allows another call"""
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        async with self._condition:
+            await self._condition.wait_for(lambda: self._inflight < int(self.limit))
+            self._inflight += 1
+        try:
+            yield
+        finally:
+            async with self._condition:
+                self._inflight -= 1
+                self._condition.notify_all()
+
+    def _p95_latency(self) -> float:
+        """95th percentile of the recent latency window"""
+        ordered = sorted(self._latencies)
+        return ordered[int(len(ordered) * 0.95) - 1] if len(ordered) >= 20 else 0.0
+
+    def observe(self, latency: float, status_code: Optional[int]):
+        """Adjust the limit from one call's latency and status (None for a connection failure)"""
+        if status_code is None or status_code == 429 or status_code >= 500:
+            previous = self.limit
+            self.limit = max(float(self.c_min), self.limit * self.beta)
+            if int(self.limit) < int(previous):
+                logger.warning(f"📉 Stripe concurrency limit cut to {int(self.limit)} (status {status_code})")
+            return
+
+        self._latencies.append(latency)
+        if self._p95_latency() < self.target_latency:
+            # Spread alpha over a full window of responses, like TCP congestion avoidance
+            self.limit = min(float(self.c_max), self.limit + self.alpha / self.limit)
+
+class AdaptiveHTTPXClient(stripe.HTTPXClient):
+    """Stripe HTTP client whose async requests share one AIMD concurrency budget"""
+
+    def __init__(self, controller: AIMDConcurrencyController, **kwargs):
+        super().__init__(**kwargs)
+        self.controller = controller
+
+    async def request_async(self, method, url, headers, post_data=None):
+        # Called once per attempt, so the SDK's retry backoff doesn't hold a slot
+        async with self.controller.slot():
+            start = time.monotonic()
+            status_code = None
+            try:
+                content, status_code, response_headers = await super().request_async(
+                    method, url, headers, post_data
+                )
+                return content, status_code, response_headers
+            finally:
+                self.controller.observe(time.monotonic() - start, status_code)
+
+# Global Stripe limiter instances
+stripe_limiter = StripeConcurrencyLimiter()
+stripe_concurrency = AIMDConcurrencyController()
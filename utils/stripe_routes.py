@@ -1,20 +1,53 @@
 import os
+import hmac
+import json
+import hashlib
+import httpx
 import stripe
+import asyncio
 import logging
-from fastapi import APIRouter, HTTPException, Request, Depends
-from fastapi.responses import JSONResponse
+import time
+import weakref
+from collections import OrderedDict
+from datetime import datetime, timezone
+from fastapi import APIRouter, HTTPException, Request, Depends, Header, BackgroundTasks
+from fastapi.responses import JSONResponse, ORJSONResponse
 from pydantic import BaseModel
-from typing import Optional
-from supabase import create_client, Client
+from typing import List, Optional, Tuple
+from supabase import AsyncClient, AsyncClientOptions
 from dotenv import load_dotenv
+from .stripe_limiter import limit_stripe_mutations, AdaptiveHTTPXClient, stripe_concurrency
+from .stripe_cache import stripe_cache
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+    orjson = None
+
+try:
+    import h2  # noqa: F401 - enables HTTP/2 in httpx
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
 
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+_json_loads = orjson.loads if ORJSON_AVAILABLE else json.loads
+
 # Initialize Stripe - Use Supabase Vault in production
 stripe.api_key = os.getenv("STRIPE_SECRET_KEY")
 
+# One pooled HTTP client for every Stripe call so connections are kept alive between
+# requests; async calls share an adaptive concurrency budget to stay under Stripe's rate limit
+stripe.default_http_client = AdaptiveHTTPXClient(stripe_concurrency, allow_sync_methods=True)
+
+# Let the SDK retry 429 / lock-timeout 409 responses with jittered exponential backoff
+stripe.max_network_retries = 2
+
 # Log Stripe environment for debugging
 if stripe.api_key:
     if stripe.api_key.startswith('sk_test_'):
@@ -26,12 +59,64 @@ if stripe.api_key:
 else:
     logger.error("❌ No Stripe secret key found in environment variables")
 
-# Initialize Supabase
+# Initialize Supabase with the async client so queries don't block the event loop.
+# The service key is sent as the bearer token, so no auth session is fetched at startup.
 supabase_url = os.getenv("SUPABASE_URL")
 supabase_key = os.getenv("SUPABASE_SERVICE_KEY")
-supabase: Client = create_client(supabase_url, supabase_key)
+# Explicitly sized pool so concurrent webhooks share keep-alive connections to PostgREST
+_supabase_http = httpx.AsyncClient(
+    http2=HTTP2_AVAILABLE,
+    follow_redirects=True,
+    limits=httpx.Limits(max_connections=50, max_keepalive_connections=20),
+    timeout=httpx.Timeout(120.0, connect=10.0)
+)
+supabase: AsyncClient = AsyncClient(supabase_url, supabase_key, AsyncClientOptions(httpx_client=_supabase_http))
+
+def _profiles():
+    """Fresh query builder for user_profiles (builders are single-use)"""
+    return supabase.table("user_profiles")
+
+def _usage():
+    """Fresh query builder for user_usage (builders are single-use)"""
+    return supabase.table("user_usage")
+
+# Serialize responses with orjson when it is installed
+StripeJSONResponse = ORJSONResponse if ORJSON_AVAILABLE else JSONResponse
+
+router = APIRouter(prefix="/api/stripe", tags=["stripe"], default_response_class=StripeJSONResponse)
+
+# Shared secret for diagnostic endpoints; they are disabled when unset
+ADMIN_API_KEY = os.getenv("ADMIN_API_KEY")
 
-router = APIRouter(prefix="/api/stripe", tags=["stripe"])
+async def require_admin(x_admin_key: Optional[str] = Header(None)):
+    """Reject diagnostic requests that don't carry the configured admin key"""
+    if not ADMIN_API_KEY or not x_admin_key or not hmac.compare_digest(x_admin_key, ADMIN_API_KEY):
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+# Connections opened per service at startup so early requests skip the TLS handshake
+WARMUP_CONNECTIONS = 4
+
+async def warm_connections():
+    """Pre-open pooled Stripe and Supabase connections"""
+    tasks = [
+        _profiles().select("id").limit(1).execute()
+        for _ in range(WARMUP_CONNECTIONS)
+    ]
+    if stripe.api_key:
+        tasks += [stripe.Price.list_async(limit=1) for _ in range(WARMUP_CONNECTIONS)]
+    
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    failures = [r for r in results if isinstance(r, Exception)]
+    if failures:
+        logger.warning(f"⚠️ {len(failures)}/{len(results)} warm-up requests failed: {str(failures[0])}")
+    else:
+        logger.info(f"🔥 Warmed {len(results)} Stripe/Supabase connections")
+
+async def close_connections():
+    """Close the pooled Stripe and Supabase HTTP clients"""
+    await stripe.default_http_client.close_async()
+    await _supabase_http.aclose()
+    logger.info("🔌 Stripe and Supabase HTTP clients closed")
 
 # Stripe Price IDs from environment
 STRIPE_HOBBY_MONTHLY_PRICE_ID = os.getenv("STRIPE_HOBBY_MONTHLY_PRICE_ID")
@@ -41,6 +126,70 @@ STRIPE_STARTER_ANNUAL_PRICE_ID = os.getenv("STRIPE_STARTER_ANNUAL_PRICE_ID")
 STRIPE_EXPERT_MONTHLY_PRICE_ID = os.getenv("STRIPE_EXPERT_MONTHLY_PRICE_ID")
 STRIPE_EXPERT_ANNUAL_PRICE_ID = os.getenv("STRIPE_EXPERT_ANNUAL_PRICE_ID")
 FRONTEND_URL = os.getenv("FRONTEND_URL", "http://localhost:3000")
+STRIPE_WEBHOOK_SECRET = os.getenv("STRIPE_WEBHOOK_SECRET")
+
+# Default redirect URLs for checkout and the billing portal
+DEFAULT_SUCCESS_URL = f"{FRONTEND_URL}/success?session_id={{CHECKOUT_SESSION_ID}}"
+DEFAULT_CANCEL_URL = f"{FRONTEND_URL}/pricing"
+DEFAULT_RETURN_URL = f"{FRONTEND_URL}/dashboard"
+
+# Env var name -> configured price ID, reported by /debug-prices
+CONFIGURED_PRICE_IDS = {
+    "STRIPE_HOBBY_MONTHLY_PRICE_ID": STRIPE_HOBBY_MONTHLY_PRICE_ID,
+    "STRIPE_HOBBY_ANNUAL_PRICE_ID": STRIPE_HOBBY_ANNUAL_PRICE_ID,
+    "STRIPE_STARTER_MONTHLY_PRICE_ID": STRIPE_STARTER_MONTHLY_PRICE_ID,
+    "STRIPE_STARTER_ANNUAL_PRICE_ID": STRIPE_STARTER_ANNUAL_PRICE_ID,
+    "STRIPE_EXPERT_MONTHLY_PRICE_ID": STRIPE_EXPERT_MONTHLY_PRICE_ID,
+    "STRIPE_EXPERT_ANNUAL_PRICE_ID": STRIPE_EXPERT_ANNUAL_PRICE_ID,
+}
+
+# Plan name -> monthly clips limit; the single source for every plan's limit
+CLIPS_LIMIT_BY_PLAN = {"free": 3, "hobby": 50, "starter": 150, "expert": 250}
+
+# Price ID -> (plan, monthly clips limit); unknown prices fall back to hobby
+DEFAULT_PLAN = ("hobby", CLIPS_LIMIT_BY_PLAN["hobby"])
+PRICE_TO_PLAN = {
+    price_id: (plan, CLIPS_LIMIT_BY_PLAN[plan])
+    for price_id, plan in [
+        (STRIPE_HOBBY_MONTHLY_PRICE_ID, "hobby"),
+        (STRIPE_HOBBY_ANNUAL_PRICE_ID, "hobby"),
+        (STRIPE_STARTER_MONTHLY_PRICE_ID, "starter"),
+        (STRIPE_STARTER_ANNUAL_PRICE_ID, "starter"),
+        (STRIPE_EXPERT_MONTHLY_PRICE_ID, "expert"),
+        (STRIPE_EXPERT_ANNUAL_PRICE_ID, "expert"),
+    ]
+    if price_id
+}
+
+# Max concurrent Stripe lookups when sweeping customers (Stripe allows ~100 req/s)
+CLEANUP_CONCURRENCY = 20
+
+# Short-lived user_id -> (Stripe customer ID, cached_at) cache so repeat
+# checkout/portal requests skip the user_profiles lookup
+CUSTOMER_CACHE_TTL = 60  # seconds
+CUSTOMER_CACHE_MAX_SIZE = 10000
+_customer_cache: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+_customer_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+# Stripe customer ID -> ((user_id, plan), cached_at), filled by webhooks so the
+# burst of events Stripe sends per customer skips repeated user_profiles lookups
+CUSTOMER_USER_CACHE_TTL = 900  # seconds
+_customer_user_cache: "OrderedDict[str, Tuple[Tuple[str, str], float]]" = OrderedDict()
+
+# How long subscription summaries from Stripe are served from cache
+SUBSCRIPTION_CACHE_TTL = 45  # seconds
+# Webhook mirrors are kept short: Stripe doesn't order events, so a stale write must expire quickly
+SUBSCRIPTION_MIRROR_TTL = 300  # seconds
+PRICE_CACHE_TTL = 3600  # prices rarely change
+
+# Webhooks larger than this are rejected while streaming instead of being buffered
+WEBHOOK_MAX_BYTES = 1024 * 1024  # 1 MiB
+
+# How long a processed webhook event ID is remembered, so Stripe redeliveries are dropped early
+WEBHOOK_REPLAY_TTL = 3 * 86400  # Stripe retries undelivered events for up to 3 days
+# An accepted event is only held this long until its handler succeeds, so a worker that dies
+# mid-processing doesn't block resends of the event for days
+WEBHOOK_CLAIM_TTL = 600
 
 class CheckoutRequest(BaseModel):
     price_id: str
@@ -63,31 +212,44 @@ class CancelRequest(BaseModel):
 class ReactivateRequest(BaseModel):
     user_id: str
 
+async def _create_checkout(request: CheckoutRequest):
+    """Create the checkout session, recreating the customer once if Stripe no longer has it"""
+    force_new = False
+    while True:
+        # Get or create customer (with improved error handling)
+        customer = await get_or_create_customer(request.user_id, request.referral, force_new=force_new)
+        logger.info(f"👤 Customer ID: {customer.id}")
+        
+        try:
+            return await stripe.checkout.Session.create_async(
+                customer=customer.id,
+                payment_method_types=['card'],
+                line_items=[{
+                    'price': request.price_id,
+                    'quantity': 1,
+                }],
+                mode='subscription',
+                success_url=request.success_url or DEFAULT_SUCCESS_URL,
+                cancel_url=request.cancel_url or DEFAULT_CANCEL_URL,
+                metadata={
+                    'user_id': request.user_id
+                }
+            )
+        except stripe.error.InvalidRequestError as stripe_error:
+            if force_new or "No such customer" not in str(stripe_error):
+                raise
+            # Retry once with a fresh customer, which replaces the stale stored ID
+            logger.info(f"🔄 Customer doesn't exist, forcing recreation for user {request.user_id}")
+            force_new = True
+
 @router.post("/create-checkout-session")
+@limit_stripe_mutations
 async def create_checkout_session(request: CheckoutRequest):
     """Create a Stripe checkout session"""
     try:
         logger.info(f"💳 Creating checkout session for user {request.user_id} with price {request.price_id}")
         
-        # Get or create customer (with improved error handling)
-        customer = await get_or_create_customer(request.user_id, request.referral)
-        logger.info(f"👤 Customer ID: {customer.id}")
-        
-        # Create checkout session
-        session = stripe.checkout.Session.create(
-            customer=customer.id,
-            payment_method_types=['card'],
-            line_items=[{
-                'price': request.price_id,
-                'quantity': 1,
-            }],
-            mode='subscription',
-            success_url=request.success_url or f"{FRONTEND_URL}/success?session_id={{CHECKOUT_SESSION_ID}}",
-            cancel_url=request.cancel_url or f"{FRONTEND_URL}/pricing",
-            metadata={
-                'user_id': request.user_id
-            }
-        )
+        session = await _create_checkout(request)
         
         logger.info(f"✅ Created checkout session for user {request.user_id}: {session.id}")
         return {"checkout_url": session.url}
@@ -96,39 +258,7 @@ async def create_checkout_session(request: CheckoutRequest):
         error_msg = str(stripe_error)
         logger.error(f"❌ Stripe InvalidRequestError: {error_msg}")
         
-        if "No such customer" in error_msg:
-            # Customer doesn't exist, try to recreate
-            logger.info(f"🔄 Customer doesn't exist, forcing recreation for user {request.user_id}")
-            try:
-                # Clear customer ID from database and retry once
-                supabase.table("user_profiles").update({
-                    "stripe_customer_id": None
-                }).eq("id", request.user_id).execute()
-                
-                # Retry with fresh customer
-                customer = await get_or_create_customer(request.user_id)
-                session = stripe.checkout.Session.create(
-                    customer=customer.id,
-                    payment_method_types=['card'],
-                    line_items=[{
-                        'price': request.price_id,
-                        'quantity': 1,
-                    }],
-                    mode='subscription',
-                    success_url=request.success_url or f"{FRONTEND_URL}/success?session_id={{CHECKOUT_SESSION_ID}}",
-                    cancel_url=request.cancel_url or f"{FRONTEND_URL}/pricing",
-                    metadata={
-                        'user_id': request.user_id
-                    }
-                )
-                logger.info(f"✅ Retry successful - created checkout session: {session.id}")
-                return {"checkout_url": session.url}
-                
-            except Exception as retry_error:
-                logger.error(f"❌ Retry failed: {str(retry_error)}")
-                raise HTTPException(status_code=500, detail=f"Failed to create checkout session after retry: {str(retry_error)}")
-        
-        elif "No such price" in error_msg:
+        if "No such price" in error_msg:
             raise HTTPException(status_code=400, detail=f"Invalid price ID: {request.price_id}")
         else:
             raise HTTPException(status_code=400, detail=f"Stripe error: {error_msg}")
@@ -152,9 +282,9 @@ async def create_portal_session(request: PortalRequest):
         logger.info(f"👤 Found/created customer: {customer.id} for user: {request.user_id}")
         
         # Create portal session
-        session = stripe.billing_portal.Session.create(
+        session = await stripe.billing_portal.Session.create_async(
             customer=customer.id,
-            return_url=f"{FRONTEND_URL}/dashboard"
+            return_url=DEFAULT_RETURN_URL
         )
         
         logger.info(f"✅ Created portal session for user {request.user_id}, URL: {session.url}")
@@ -190,11 +320,11 @@ async def create_portal_session(request: PortalRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/subscription/{user_id}")
-async def get_user_subscription(user_id: str):
-    """Get user's current subscription details"""
+async def get_user_subscription(user_id: str, fresh: bool = False):
+    """Get user's current subscription details (fresh=true re-reads the subscription from Stripe)"""
     try:
-        # Get user profile with subscription info
-        response = supabase.table("user_profiles").select("*").eq("id", user_id).execute()
+        # Get only the profile columns this endpoint returns
+        response = await _profiles().select("plan, stripe_subscription_id, subscription_current_period_end").eq("id", user_id).execute()
         
         if not response.data:
             raise HTTPException(status_code=404, detail="User not found")
@@ -203,16 +333,15 @@ async def get_user_subscription(user_id: str):
         
         # If user has a subscription, get details from Stripe
         if user_profile.get("stripe_subscription_id"):
-            subscription = stripe.Subscription.retrieve(user_profile["stripe_subscription_id"])
-            price_id = subscription['items']['data'][0]['price']['id']
+            subscription = await get_subscription_summary(user_profile["stripe_subscription_id"], fresh=fresh)
             
             return {
                 "has_subscription": True,
                 "plan": user_profile.get("plan", "free"),
                 "status": subscription["status"],
                 "current_period_end": user_profile.get("subscription_current_period_end"),
-                "cancel_at_period_end": subscription.get("cancel_at_period_end", False),
-                "price_id": price_id
+                "cancel_at_period_end": subscription["cancel_at_period_end"],
+                "price_id": subscription["price_id"]
             }
         else:
             return {
@@ -228,7 +357,34 @@ async def get_user_subscription(user_id: str):
         logger.error(f"❌ Error getting subscription: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def _summarize_subscription(subscription) -> dict:
+    """Reduce a Stripe subscription to the fields the dashboard needs"""
+    return {
+        "status": subscription["status"],
+        "cancel_at_period_end": subscription.get("cancel_at_period_end", False),
+        "price_id": subscription['items']['data'][0]['price']['id']
+    }
+
+async def get_subscription_summary(subscription_id: str, fresh: bool = False) -> dict:
+    """Status, cancellation flag and price of a subscription, served from the webhook mirror or a short cache"""
+    cache_key = f"sub:{subscription_id}"
+    summary = None if fresh else await stripe_cache.get(cache_key)
+    if summary is None:
+        subscription = await stripe.Subscription.retrieve_async(subscription_id)
+        summary = _summarize_subscription(subscription)
+        await stripe_cache.set(cache_key, summary, SUBSCRIPTION_CACHE_TTL)
+    return summary
+
+async def mirror_subscription_summary(subscription):
+    """Store the summary of a subscription received from Stripe so GET /subscription skips Stripe"""
+    await stripe_cache.set(f"sub:{subscription['id']}", _summarize_subscription(subscription), SUBSCRIPTION_MIRROR_TTL)
+
+async def invalidate_subscription_summary(subscription_id: str):
+    """Drop a cached subscription summary after the subscription changes"""
+    await stripe_cache.delete(f"sub:{subscription_id}")
+
 @router.post("/upgrade-subscription")
+@limit_stripe_mutations
 async def upgrade_subscription(request: UpgradeRequest):
     """Upgrade user's subscription to a new plan"""
     try:
@@ -236,7 +392,7 @@ async def upgrade_subscription(request: UpgradeRequest):
         new_price_id = request.new_price_id
         
         # Get user's current subscription
-        response = supabase.table("user_profiles").select("stripe_subscription_id").eq("id", user_id).execute()
+        response = await _profiles().select("stripe_subscription_id").eq("id", user_id).execute()
         
         if not response.data or not response.data[0].get("stripe_subscription_id"):
             raise HTTPException(status_code=400, detail="User has no active subscription to upgrade")
@@ -244,11 +400,11 @@ async def upgrade_subscription(request: UpgradeRequest):
         subscription_id = response.data[0]["stripe_subscription_id"]
         
         # Get current subscription
-        subscription = stripe.Subscription.retrieve(subscription_id)
+        subscription = await stripe.Subscription.retrieve_async(subscription_id)
         current_item_id = subscription['items']['data'][0]['id']
         
         # Update the subscription with new price
-        updated_subscription = stripe.Subscription.modify(
+        updated_subscription = await stripe.Subscription.modify_async(
             subscription_id,
             items=[{
                 'id': current_item_id,
@@ -256,6 +412,7 @@ async def upgrade_subscription(request: UpgradeRequest):
             }],
             proration_behavior='immediate_with_adjustment'
         )
+        await invalidate_subscription_summary(subscription_id)
         
         logger.info(f"✅ Upgraded subscription for user {user_id} to price {new_price_id}")
         
@@ -270,6 +427,7 @@ async def upgrade_subscription(request: UpgradeRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/cancel-subscription")
+@limit_stripe_mutations
 async def cancel_subscription(request: CancelRequest):
     """Cancel user's subscription (at period end)"""
     try:
@@ -277,7 +435,7 @@ async def cancel_subscription(request: CancelRequest):
         immediate = request.immediate
         
         # Get user's current subscription
-        response = supabase.table("user_profiles").select("stripe_subscription_id").eq("id", user_id).execute()
+        response = await _profiles().select("stripe_subscription_id").eq("id", user_id).execute()
         
         if not response.data or not response.data[0].get("stripe_subscription_id"):
             raise HTTPException(status_code=400, detail="User has no active subscription to cancel")
@@ -286,15 +444,17 @@ async def cancel_subscription(request: CancelRequest):
         
         if immediate:
             # Cancel immediately
-            stripe.Subscription.delete(subscription_id)
+            await stripe.Subscription.cancel_async(subscription_id)
+            await invalidate_subscription_summary(subscription_id)
             logger.info(f"✅ Immediately canceled subscription for user {user_id}")
             message = "Subscription canceled immediately"
         else:
             # Cancel at period end
-            stripe.Subscription.modify(
+            await stripe.Subscription.modify_async(
                 subscription_id,
                 cancel_at_period_end=True
             )
+            await invalidate_subscription_summary(subscription_id)
             logger.info(f"✅ Scheduled cancellation at period end for user {user_id}")
             message = "Subscription will be canceled at the end of the current period"
         
@@ -310,13 +470,14 @@ async def cancel_subscription(request: CancelRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/reactivate-subscription")
+@limit_stripe_mutations
 async def reactivate_subscription(request: ReactivateRequest):
     """Reactivate a subscription that's set to cancel at period end"""
     try:
         user_id = request.user_id
         
         # Get user's current subscription
-        response = supabase.table("user_profiles").select("stripe_subscription_id").eq("id", user_id).execute()
+        response = await _profiles().select("stripe_subscription_id").eq("id", user_id).execute()
         
         if not response.data or not response.data[0].get("stripe_subscription_id"):
             raise HTTPException(status_code=400, detail="User has no subscription to reactivate")
@@ -324,10 +485,11 @@ async def reactivate_subscription(request: ReactivateRequest):
         subscription_id = response.data[0]["stripe_subscription_id"]
         
         # Remove the cancellation
-        stripe.Subscription.modify(
+        await stripe.Subscription.modify_async(
             subscription_id,
             cancel_at_period_end=False
         )
+        await invalidate_subscription_summary(subscription_id)
         
         logger.info(f"✅ Reactivated subscription for user {user_id}")
         
@@ -341,81 +503,211 @@ async def reactivate_subscription(request: ReactivateRequest):
         logger.error(f"❌ Error reactivating subscription: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+async def _claim_event(event_id: str) -> bool:
+    """Atomically record a webhook event as accepted; False if any worker already accepted it"""
+    return await stripe_cache.add(f"event:{event_id}", 1, WEBHOOK_CLAIM_TTL)
+
+async def _confirm_event(event_id: str):
+    """Keep a successfully processed webhook event for the full replay window"""
+    await stripe_cache.set(f"event:{event_id}", 1, WEBHOOK_REPLAY_TTL)
+
+async def _release_event(event_id: str):
+    """Forget an accepted webhook event so a redelivery of it is processed again"""
+    await stripe_cache.delete(f"event:{event_id}")
+
+def _parse_signature_header(sig_header: Optional[str]) -> Tuple[int, List[str]]:
+    """Split a Stripe-Signature header into its timestamp and v1 signatures"""
+    timestamp = None
+    signatures = []
+    for item in (sig_header or "").split(","):
+        key, _, value = item.strip().partition("=")
+        if key == "t":
+            timestamp = int(value) if value.isdigit() else None
+        elif key == "v1":
+            signatures.append(value)
+    
+    if timestamp is None or not signatures:
+        raise stripe.error.SignatureVerificationError(
+            "Unable to extract timestamp and signatures from header", sig_header
+        )
+    return timestamp, signatures
+
+async def _read_verified_payload(request: Request, sig_header: Optional[str], secret: str) -> bytes:
+    """Stream the webhook body through HMAC-SHA256, rejecting bad headers before reading it"""
+    timestamp, signatures = _parse_signature_header(sig_header)
+    if timestamp < time.time() - stripe.Webhook.DEFAULT_TOLERANCE:
+        raise stripe.error.SignatureVerificationError(
+            f"Timestamp outside the tolerance zone ({timestamp})", sig_header
+        )
+    
+    mac = hmac.new(secret.encode("utf-8"), f"{timestamp}.".encode(), hashlib.sha256)
+    chunks = []
+    size = 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > WEBHOOK_MAX_BYTES:
+            raise ValueError(f"Webhook payload exceeds {WEBHOOK_MAX_BYTES} bytes")
+        mac.update(chunk)
+        chunks.append(chunk)
+    
+    expected = mac.hexdigest()
+    if not any(hmac.compare_digest(expected, signature) for signature in signatures):
+        raise stripe.error.SignatureVerificationError(
+            "No signatures found matching the expected signature for payload", sig_header
+        )
+    return b"".join(chunks)
+
+async def _process_event(event: dict):
+    """Run the handler for a verified webhook event after Stripe has been acknowledged"""
+    event_type = event['type']
+    handler = WEBHOOK_HANDLERS.get(event_type)
+    if handler is None:
+        logger.info("🔔 Unhandled event type: %s", event_type)
+        return
+    
+    # Handlers log and re-raise their failures so the claim below can be released
+    try:
+        await handler(event['data']['object'])
+    except Exception as e:
+        logger.error("❌ Webhook handler error for %s (%s): %s", event_type, event.get('id'), e)
+        # Let a resend of this event from the Stripe dashboard be processed again
+        if event.get('id'):
+            await _release_event(event['id'])
+        return
+    
+    if event.get('id'):
+        await _confirm_event(event['id'])
+
 @router.post("/webhook")
-async def stripe_webhook(request: Request):
+async def stripe_webhook(request: Request, background_tasks: BackgroundTasks):
     """Handle Stripe webhooks"""
+    event_id = None
     try:
-        payload = await request.body()
         sig_header = request.headers.get('stripe-signature')
-        webhook_secret = os.getenv("STRIPE_WEBHOOK_SECRET")
         
-        logger.info(f"🔔 Webhook received: {len(payload)} bytes, signature present: {bool(sig_header)}")
+        # Verify the signature while streaming the body in
+        payload = await _read_verified_payload(request, sig_header, STRIPE_WEBHOOK_SECRET)
+        logger.info("🔔 Webhook received: %s bytes", len(payload))
         
-        # Verify webhook signature
-        event = stripe.Webhook.construct_event(
-            payload, sig_header, webhook_secret
-        )
+        # Parse the payload once with orjson; the verified dict is dispatched directly
+        event = _json_loads(payload)
+        if not isinstance(event, dict):
+            raise ValueError("Webhook payload is not a JSON object")
         
-        logger.info(f"✅ Webhook verified successfully: {event['type']}")
-        
-        # Handle the event
-        if event['type'] == 'checkout.session.completed':
-            await handle_checkout_completed(event['data']['object'])
-        elif event['type'] == 'customer.subscription.updated':
-            await handle_subscription_updated(event['data']['object'])
-        elif event['type'] == 'customer.subscription.deleted':
-            await handle_subscription_deleted(event['data']['object'])
-        elif event['type'] == 'payment_intent.succeeded':
-            await handle_payment_intent_succeeded(event['data']['object'])
-        elif event['type'] == 'payment_intent.payment_failed':
-            await handle_payment_intent_failed(event['data']['object'])
-        elif event['type'] == 'customer.subscription.created':
-            await handle_subscription_created(event['data']['object'])
-        elif event['type'] == 'invoice.payment_succeeded':
-            await handle_invoice_payment_succeeded(event['data']['object'])
-        elif event['type'] == 'invoice.payment_failed':
-            await handle_invoice_payment_failed(event['data']['object'])
-        else:
-            logger.info(f"🔔 Unhandled event type: {event['type']}")
+        # Drop redeliveries before any handler work; the claim is shared across workers
+        event_id = event.get('id')
+        if event_id and not await _claim_event(event_id):
+            logger.info("🔁 Ignoring duplicate webhook event: %s", event_id)
+            return StripeJSONResponse(content={"status": "duplicate"})
+        
+        logger.info("✅ Webhook verified successfully: %s", event['type'])
+        
+        # Acknowledge right away and handle the event after the response is sent
+        background_tasks.add_task(_process_event, event)
         
-        return JSONResponse(content={"status": "success"})
+        return StripeJSONResponse(content={"status": "success"})
         
     except ValueError as e:
-        logger.error(f"❌ Invalid payload: {str(e)}")
+        logger.error("❌ Invalid payload: %s", e)
         raise HTTPException(status_code=400, detail="Invalid payload")
     except stripe.error.SignatureVerificationError as e:
-        logger.error(f"❌ Invalid signature: {str(e)}")
+        logger.error("❌ Invalid signature: %s", e)
         raise HTTPException(status_code=400, detail="Invalid signature")
     except Exception as e:
-        logger.error(f"❌ Webhook error: {str(e)}")
+        logger.error("❌ Webhook error: %s", e)
+        # Let Stripe's retry of this event through
+        if event_id:
+            await _release_event(event_id)
         raise HTTPException(status_code=500, detail=str(e))
 
-async def get_or_create_customer(user_id: str, referral_id: str = None):
-    """Get existing Stripe customer or create new one"""
+def _get_cached_customer_id(user_id: str) -> Optional[str]:
+    """Return the cached Stripe customer ID for a user if it is still fresh"""
+    entry = _customer_cache.get(user_id)
+    if entry is None:
+        return None
+    customer_id, cached_at = entry
+    if time.monotonic() - cached_at >= CUSTOMER_CACHE_TTL:
+        _customer_cache.pop(user_id, None)
+        return None
+    return customer_id
+
+def _cache_customer_id(user_id: str, customer_id: str):
+    """Remember a user's Stripe customer ID, evicting the oldest entry when full"""
+    _customer_cache[user_id] = (customer_id, time.monotonic())
+    _customer_cache.move_to_end(user_id)
+    if len(_customer_cache) > CUSTOMER_CACHE_MAX_SIZE:
+        _customer_cache.popitem(last=False)
+
+def _invalidate_customer_id(user_id: str):
+    """Drop a user's cached Stripe customer ID after it changes"""
+    _customer_cache.pop(user_id, None)
+
+def _get_cached_customer_user(customer_id: str) -> Optional[Tuple[str, str]]:
+    """Return the cached (user_id, plan) for a Stripe customer if it is still fresh"""
+    entry = _customer_user_cache.get(customer_id)
+    if entry is None:
+        return None
+    user, cached_at = entry
+    if time.monotonic() - cached_at >= CUSTOMER_USER_CACHE_TTL:
+        _customer_user_cache.pop(customer_id, None)
+        return None
+    return user
+
+def _cache_customer_user(customer_id: str, user_id: str, plan: str):
+    """Remember which user and plan a Stripe customer maps to, evicting the oldest entry when full"""
+    _customer_user_cache[customer_id] = ((user_id, plan), time.monotonic())
+    _customer_user_cache.move_to_end(customer_id)
+    if len(_customer_user_cache) > CUSTOMER_CACHE_MAX_SIZE:
+        _customer_user_cache.popitem(last=False)
+
+async def get_or_create_customer(user_id: str, referral_id: str = None, force_new: bool = False):
+    """Get existing Stripe customer or create new one (force_new skips the stored customer)"""
+    # Serialize per user so concurrent requests don't race to create duplicate customers
+    lock = _customer_locks.get(user_id)
+    if lock is None:
+        lock = _customer_locks[user_id] = asyncio.Lock()
+    
+    async with lock:
+        return await _get_or_create_customer(user_id, referral_id, force_new)
+
+async def _get_or_create_customer(user_id: str, referral_id: str, force_new: bool):
+    """Resolve the user's Stripe customer, preferring the cached customer ID"""
     try:
-        # Check if user already has a customer ID
-        response = supabase.table("user_profiles").select("stripe_customer_id, email").eq("id", user_id).execute()
-        
-        if response.data and response.data[0]["stripe_customer_id"]:
+        response = None
+        stale_customer_id = None
+        customer_id = None if force_new else _get_cached_customer_id(user_id)
+        
+        if customer_id is None:
+            # Check if user already has a customer ID
+            response = await _profiles().select("stripe_customer_id, email").eq("id", user_id).execute()
+            if response.data and response.data[0]["stripe_customer_id"]:
+                if force_new:
+                    stale_customer_id = response.data[0]["stripe_customer_id"]
+                else:
+                    customer_id = response.data[0]["stripe_customer_id"]
+        
+        if customer_id:
             # Try to retrieve existing customer, but handle if it doesn't exist
             try:
-                customer = stripe.Customer.retrieve(response.data[0]["stripe_customer_id"])
+                customer = await stripe.Customer.retrieve_async(customer_id)
                 # If a referral ID is provided and the customer doesn't have one, update the customer
                 if referral_id and 'referral' not in customer.get('metadata', {}):
-                    stripe.Customer.modify(
+                    await stripe.Customer.modify_async(
                         customer.id,
                         metadata={'referral': referral_id}
                     )
                     logger.info(f"✅ Added referral ID to existing customer {customer.id}")
+                _cache_customer_id(user_id, customer.id)
                 return customer
             except stripe.error.InvalidRequestError as e:
                 logger.warning(f"⚠️ Stored customer ID doesn't exist in Stripe: {str(e)}")
                 logger.info(f"🔄 Creating new customer for user {user_id}")
-                # Clear the invalid customer ID from database
-                supabase.table("user_profiles").update({
-                    "stripe_customer_id": None
-                }).eq("id", user_id).execute()
-                # Continue to create new customer below
+                _invalidate_customer_id(user_id)
+                stale_customer_id = customer_id
+                # Continue to create new customer below; the profile update there replaces the invalid ID
+        
+        if response is None:
+            response = await _profiles().select("email").eq("id", user_id).execute()
         
         # Get user email
         user_email = response.data[0]["email"] if response.data else f"user-{user_id}@clipforge.ai"
@@ -428,12 +720,15 @@ async def get_or_create_customer(user_id: str, referral_id: str = None):
         if referral_id:
             customer_params['metadata']['referral'] = referral_id
 
-        customer = stripe.Customer.create(**customer_params)
+        # Idempotency key makes concurrent creates from other workers return the same customer
+        idempotency_key = f"customer-create-{user_id}-{stale_customer_id or 'none'}-{referral_id or 'none'}"
+        customer = await stripe.Customer.create_async(idempotency_key=idempotency_key, **customer_params)
         
         # Update user profile with customer ID
-        supabase.table("user_profiles").update({
+        await _profiles().update({
             "stripe_customer_id": customer.id
         }).eq("id", user_id).execute()
+        _cache_customer_id(user_id, customer.id)
         
         logger.info(f"✅ Created Stripe customer for user {user_id}")
         return customer
@@ -452,12 +747,12 @@ async def create_test_user(user_id: str = None, email: str = None):
         test_user_id = user_id or str(uuid.uuid4())
         test_email = email or f"test-{test_user_id[:8]}@example.com"
         
-        # Insert test user into user_profiles table
-        response = supabase.table("user_profiles").insert({
+        # Upsert so re-running with an existing user ID succeeds in the same single call
+        response = await _profiles().upsert({
             "id": test_user_id,
             "email": test_email,
             "plan": "hobby"  # Using lowercase "hobby" to match existing data
-        }).execute()
+        }, on_conflict="id").execute()
         
         if response.data:
             logger.info(f"✅ Created test user: {test_user_id} with email: {test_email}")
@@ -481,12 +776,12 @@ async def create_test_user(user_id: str = None, email: str = None):
             "message": f"Error creating test user: {str(e)}"
         }
 
-@router.get("/get-test-user")
+@router.get("/get-test-user", dependencies=[Depends(require_admin)])
 async def get_test_user():
     """Get an existing user for testing Stripe integration"""
     try:
         # Get a user without Stripe customer ID for testing
-        response = supabase.table("user_profiles").select("id, email, plan").is_("stripe_customer_id", "null").limit(1).execute()
+        response = await _profiles().select("id, email, plan").is_("stripe_customer_id", "null").limit(1).execute()
         
         if response.data:
             user = response.data[0]
@@ -499,7 +794,7 @@ async def get_test_user():
             }
         else:
             # If no users without Stripe customer, get any user
-            response = supabase.table("user_profiles").select("id, email, plan").limit(1).execute()
+            response = await _profiles().select("id, email, plan").limit(1).execute()
             if response.data:
                 user = response.data[0]
                 return {
@@ -522,12 +817,12 @@ async def get_test_user():
             "message": f"Error getting test user: {str(e)}"
         }
 
-@router.get("/check-plan-values")
+@router.get("/check-plan-values", dependencies=[Depends(require_admin)])
 async def check_plan_values():
     """Check what plan values exist in the database"""
     try:
         # Get sample plans to see valid values
-        response = supabase.table("user_profiles").select("plan").limit(10).execute()
+        response = await _profiles().select("plan").limit(10).execute()
         
         plans_found = []
         if response.data:
@@ -546,17 +841,18 @@ async def check_plan_values():
             "message": f"Error checking plan values: {str(e)}"
         }
 
-@router.get("/test-db-connection")
+@router.get("/test-db-connection", dependencies=[Depends(require_admin)])
 async def test_database_connection():
     """Test Supabase database connection and user_profiles table access"""
     try:
         logger.info("Testing Supabase database connection...")
         
-        # Test basic connection
+        # Test connection and table structure in one query: row count plus one full row
         try:
-            response = supabase.table("user_profiles").select("count", count="exact").execute()
+            response = await _profiles().select("*", count="exact").limit(1).execute()
             table_count = response.count
             logger.info(f"✅ Successfully connected to user_profiles table. Row count: {table_count}")
+            logger.info(f"✅ Table structure test passed. Data: {response.data}")
         except Exception as table_error:
             logger.error(f"❌ Error accessing user_profiles table: {str(table_error)}")
             return {
@@ -566,21 +862,6 @@ async def test_database_connection():
                 "table_accessible": False
             }
         
-        # Test table structure
-        try:
-            # Try to select just one row to check table structure
-            response = supabase.table("user_profiles").select("*").limit(1).execute()
-            logger.info(f"✅ Table structure test passed. Data: {response.data}")
-        except Exception as structure_error:
-            logger.error(f"❌ Table structure error: {str(structure_error)}")
-            return {
-                "status": "error",
-                "message": f"Table structure issue: {str(structure_error)}",
-                "supabase_url": supabase_url,
-                "table_accessible": True,
-                "structure_test": False
-            }
-        
         return {
             "status": "success",
             "message": "Database connection and table access working correctly",
@@ -598,43 +879,51 @@ async def test_database_connection():
             "supabase_url": supabase_url
         }
 
+async def get_price_status(price_id: str) -> dict:
+    """Look up a price in Stripe, caching found prices since they rarely change"""
+    cache_key = f"price:{price_id}"
+    status = await stripe_cache.get(cache_key)
+    if status is None:
+        price = await stripe.Price.retrieve_async(price_id)
+        status = {
+            "price_id": price_id,
+            "status": "EXISTS",
+            "active": price.active,
+            "currency": price.currency,
+            "unit_amount": price.unit_amount,
+            "recurring": dict(price.recurring) if price.recurring else None
+        }
+        await stripe_cache.set(cache_key, status, PRICE_CACHE_TTL)
+    return status
+
 @router.get("/debug-prices")
 async def debug_stripe_prices():
     """Debug endpoint to check configured price IDs and verify they exist in Stripe"""
     try:
-        # Get configured price IDs
-        configured_prices = {
-            "STRIPE_HOBBY_MONTHLY_PRICE_ID": STRIPE_HOBBY_MONTHLY_PRICE_ID,
-            "STRIPE_HOBBY_ANNUAL_PRICE_ID": STRIPE_HOBBY_ANNUAL_PRICE_ID,
-            "STRIPE_STARTER_MONTHLY_PRICE_ID": STRIPE_STARTER_MONTHLY_PRICE_ID,
-            "STRIPE_STARTER_ANNUAL_PRICE_ID": STRIPE_STARTER_ANNUAL_PRICE_ID,
-            "STRIPE_EXPERT_MONTHLY_PRICE_ID": STRIPE_EXPERT_MONTHLY_PRICE_ID,
-            "STRIPE_EXPERT_ANNUAL_PRICE_ID": STRIPE_EXPERT_ANNUAL_PRICE_ID,
-        }
+        # Check all configured price IDs against Stripe concurrently
+        configured = {env_var: price_id for env_var, price_id in CONFIGURED_PRICE_IDS.items() if price_id}
+        results = await asyncio.gather(
+            *(get_price_status(price_id) for price_id in configured.values()),
+            return_exceptions=True
+        )
+        
+        results_by_env = dict(zip(configured, results))
         
-        # Check which ones exist in Stripe
         price_status = {}
-        for env_var, price_id in configured_prices.items():
+        for env_var, price_id in CONFIGURED_PRICE_IDS.items():
+            result = results_by_env.get(env_var)
             if not price_id:
                 price_status[env_var] = {"price_id": None, "status": "NOT_CONFIGURED"}
-                continue
-                
-            try:
-                price = stripe.Price.retrieve(price_id)
-                price_status[env_var] = {
-                    "price_id": price_id,
-                    "status": "EXISTS",
-                    "active": price.active,
-                    "currency": price.currency,
-                    "unit_amount": price.unit_amount,
-                    "recurring": price.recurring
-                }
-            except stripe.error.InvalidRequestError as e:
+            elif isinstance(result, stripe.error.InvalidRequestError):
                 price_status[env_var] = {
                     "price_id": price_id,
                     "status": "INVALID",
-                    "error": str(e)
+                    "error": str(result)
                 }
+            elif isinstance(result, BaseException):
+                raise result
+            else:
+                price_status[env_var] = result
         
         # Check Stripe environment
         stripe_env = "UNKNOWN"
@@ -659,26 +948,45 @@ async def cleanup_invalid_customers():
     """Admin endpoint to clean up invalid customer IDs - useful when switching Stripe environments"""
     try:
         # Get all users with customer IDs
-        response = supabase.table("user_profiles").select("id, stripe_customer_id, email").execute()
+        response = await _profiles().select("id, stripe_customer_id").execute()
         
         if not response.data:
             return {"message": "No users found"}
         
         cleaned_count = 0
+        users = [user for user in response.data if user.get("stripe_customer_id")]
         
-        for user in response.data:
-            if user.get("stripe_customer_id"):
-                try:
-                    # Try to retrieve customer from Stripe
-                    stripe.Customer.retrieve(user["stripe_customer_id"])
-                    logger.info(f"✅ Customer {user['stripe_customer_id']} exists for user {user['id']}")
-                except stripe.error.InvalidRequestError:
-                    # Customer doesn't exist, clear it
-                    logger.info(f"🧹 Clearing invalid customer ID for user {user['id']}")
-                    supabase.table("user_profiles").update({
-                        "stripe_customer_id": None
-                    }).eq("id", user["id"]).execute()
-                    cleaned_count += 1
+        # Check every stored customer against Stripe concurrently, within Stripe's rate limits
+        sem = asyncio.Semaphore(CLEANUP_CONCURRENCY)
+        
+        async def retrieve_customer(customer_id: str):
+            async with sem:
+                return await stripe.Customer.retrieve_async(customer_id)
+        
+        results = await asyncio.gather(
+            *(retrieve_customer(user["stripe_customer_id"]) for user in users),
+            return_exceptions=True
+        )
+        
+        invalid_ids = []
+        for user, result in zip(users, results):
+            if isinstance(result, stripe.error.InvalidRequestError):
+                # Customer doesn't exist, clear it below
+                logger.info(f"🧹 Clearing invalid customer ID for user {user['id']}")
+                invalid_ids.append(user["id"])
+            elif isinstance(result, BaseException):
+                raise result
+            else:
+                logger.info(f"✅ Customer {user['stripe_customer_id']} exists for user {user['id']}")
+        
+        # Clear all invalid customer IDs in a single update
+        if invalid_ids:
+            await _profiles().update({
+                "stripe_customer_id": None
+            }).in_("id", invalid_ids).execute()
+            for user_id in invalid_ids:
+                _invalidate_customer_id(user_id)
+            cleaned_count = len(invalid_ids)
         
         return {
             "message": f"Cleaned up {cleaned_count} invalid customer IDs",
@@ -690,246 +998,230 @@ async def cleanup_invalid_customers():
         logger.error(f"❌ Error cleaning up customers: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def _utcnow_iso() -> str:
+    """Current time as an explicit-UTC ISO 8601 string for updated_at columns"""
+    return datetime.now(timezone.utc).isoformat()
+
+def _epoch_to_iso(timestamp: int) -> str:
+    """Format a Stripe Unix timestamp as an explicit-UTC ISO 8601 string"""
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc).isoformat()
+
+def _subscription_state(subscription) -> Tuple[str, int, dict]:
+    """Plan, clips limit and user_profiles fields described by a Stripe subscription"""
+    subscription_item = subscription['items']['data'][0]
+    plan, clips_limit = PRICE_TO_PLAN.get(subscription_item['price']['id'], DEFAULT_PLAN)
+    return plan, clips_limit, {
+        "plan": plan,
+        "subscription_status": subscription['status'],
+        "subscription_current_period_start": _epoch_to_iso(subscription_item['current_period_start']),
+        "subscription_current_period_end": _epoch_to_iso(subscription_item['current_period_end']),
+        "updated_at": _utcnow_iso()
+    }
+
 async def handle_checkout_completed(session):
     """Handle successful checkout"""
     try:
-        logger.info(f"🔄 Processing checkout.session.completed: {session['id']}")
+        logger.info("🔄 Processing checkout.session.completed: %s", session['id'])
         
         # Get user_id from metadata
         user_id = session.get('metadata', {}).get('user_id')
         if not user_id:
             # Try to find user by customer email as fallback
             customer_id = session['customer']
-            customer = stripe.Customer.retrieve(customer_id)
+            customer = await stripe.Customer.retrieve_async(customer_id)
             customer_email = customer.email
             
             # Find user in Supabase by email
-            response = supabase.table("user_profiles").select("id").eq("email", customer_email).execute()
+            response = await _profiles().select("id").eq("email", customer_email).execute()
             if response.data:
                 user_id = response.data[0]["id"]
-                logger.info(f"📧 Found user by email: {customer_email} -> {user_id}")
+                logger.info("📧 Found user by email: %s -> %s", customer_email, user_id)
             else:
-                logger.error(f"❌ No user found for customer email: {customer_email}")
+                logger.error("❌ No user found for customer email: %s", customer_email)
                 return
         
-        subscription_id = session['subscription']
+        subscription = session['subscription']
         customer_id = session['customer']
         
-        logger.info(f"👤 Processing for user: {user_id}, customer: {customer_id}, subscription: {subscription_id}")
-        
-        # Get subscription details
-        subscription = stripe.Subscription.retrieve(subscription_id)
-        price_id = subscription['items']['data'][0]['price']['id']
-        
-        # Determine plan and limits based on price ID
-        plan = "hobby"  # Default to hobby
-        clips_limit = 50
-        
-        if price_id in [STRIPE_HOBBY_MONTHLY_PRICE_ID, STRIPE_HOBBY_ANNUAL_PRICE_ID]:
-            plan = "hobby"
-            clips_limit = 50
-        elif price_id in [STRIPE_STARTER_MONTHLY_PRICE_ID, STRIPE_STARTER_ANNUAL_PRICE_ID]:
-            plan = "starter"
-            clips_limit = 150
-        elif price_id in [STRIPE_EXPERT_MONTHLY_PRICE_ID, STRIPE_EXPERT_ANNUAL_PRICE_ID]:
-            plan = "expert"
-            clips_limit = 250
-        
-        # Convert timestamps to ISO format
-        subscription_item = subscription['items']['data'][0]
-        current_period_start = subscription_item['current_period_start']
-        current_period_end = subscription_item['current_period_end']
-        
-        from datetime import datetime
-        start_date = datetime.fromtimestamp(current_period_start).isoformat()
-        end_date = datetime.fromtimestamp(current_period_end).isoformat()
-        
-        # Update user profile with full subscription details
-        logger.info(f"📝 Updating user_profiles for user {user_id} with plan: {plan}")
-        profile_response = supabase.table("user_profiles").update({
-            "plan": plan,
-            "stripe_customer_id": customer_id,
-            "stripe_subscription_id": subscription_id,
-            "subscription_status": subscription['status'],
-            "subscription_current_period_start": start_date,
-            "subscription_current_period_end": end_date,
-            "updated_at": datetime.now().isoformat()
-        }).eq("id", user_id).execute()
+        # Use the subscription object if the session carries it expanded, otherwise fetch it
+        if isinstance(subscription, dict):
+            subscription_id = subscription['id']
+        else:
+            subscription_id = subscription
+            subscription = await stripe.Subscription.retrieve_async(subscription_id)
+        
+        logger.info("👤 Processing for user: %s, customer: %s, subscription: %s", user_id, customer_id, subscription_id)
+        
+        plan, clips_limit, profile_update = _subscription_state(subscription)
+        profile_update["stripe_customer_id"] = customer_id
+        profile_update["stripe_subscription_id"] = subscription_id
+        
+        # Update user profile with full subscription details, the month's usage limits and the
+        # dashboard's subscription mirror concurrently; none of them depends on another
+        logger.info("📝 Updating user_profiles and user_usage for user %s with plan: %s, %s clips", user_id, plan, clips_limit)
+        profile_response, _, _ = await asyncio.gather(
+            _profiles().update(profile_update).eq("id", user_id).execute(),
+            update_user_usage_limits(user_id, plan, clips_limit),
+            mirror_subscription_summary(subscription)
+        )
         
         if profile_response.data:
-            logger.info(f"✅ Successfully updated user_profiles for {user_id}")
+            _cache_customer_id(user_id, customer_id)
+            _cache_customer_user(customer_id, user_id, plan)
+            logger.info("✅ Successfully updated user_profiles for %s", user_id)
         else:
-            logger.error(f"❌ Failed to update user_profiles for {user_id}")
+            logger.error("❌ Failed to update user_profiles for %s", user_id)
         
-        # Update or create user usage for current month
-        logger.info(f"📊 Updating user_usage for user {user_id} with {clips_limit} clips")
-        await update_user_usage_limits(user_id, plan, clips_limit)
-        
-        logger.info(f"✅ Updated user {user_id} to {plan} plan with {clips_limit} clips limit")
+        logger.info("✅ Updated user %s to %s plan with %s clips limit", user_id, plan, clips_limit)
         
     except Exception as e:
-        logger.error(f"❌ Error handling checkout completed: {str(e)}")
+        logger.error("❌ Error handling checkout completed: %s", e)
+        raise
+
+async def _apply_customer_plan(customer_id: str, profile_update: dict, plan: str, clips_limit: int, *side_tasks) -> Optional[str]:
+    """Update a customer's profile and monthly usage, concurrently when the user is already cached; returns the user ID"""
+    cached_user = _get_cached_customer_user(customer_id)
+    tasks = [
+        _profiles().update(profile_update).eq("stripe_customer_id", customer_id).execute(),
+        *side_tasks
+    ]
+    if cached_user:
+        tasks.append(update_user_usage_limits(cached_user[0], plan, clips_limit))
+    
+    response = (await asyncio.gather(*tasks))[0]
+    if not response.data:
+        return None
+    
+    user_id = response.data[0]["id"]
+    _cache_customer_user(customer_id, user_id, plan)
+    if cached_user is None or cached_user[0] != user_id:
+        # User wasn't known up front, so the usage update has to follow the profile update
+        await update_user_usage_limits(user_id, plan, clips_limit)
+    return user_id
 
 async def handle_subscription_updated(subscription):
     """Handle subscription updates"""
     try:
         customer_id = subscription['customer']
+        plan, clips_limit, profile_update = _subscription_state(subscription)
         
-        # Find user by customer ID
-        response = supabase.table("user_profiles").select("id").eq("stripe_customer_id", customer_id).execute()
+        # Update the customer's profile with full subscription details and the month's usage limits
+        user_id = await _apply_customer_plan(
+            customer_id, profile_update, plan, clips_limit, mirror_subscription_summary(subscription)
+        )
         
-        if not response.data:
-            logger.warning(f"⚠️ No user found for customer {customer_id}")
+        if not user_id:
+            logger.warning("⚠️ No user found for customer %s", customer_id)
             return
         
-        user_id = response.data[0]["id"]
-        price_id = subscription['items']['data'][0]['price']['id']
-        
-        # Determine plan and limits
-        plan = "hobby"  # Default to hobby
-        clips_limit = 50
-        
-        if price_id in [STRIPE_HOBBY_MONTHLY_PRICE_ID, STRIPE_HOBBY_ANNUAL_PRICE_ID]:
-            plan = "hobby"
-            clips_limit = 50
-        elif price_id in [STRIPE_STARTER_MONTHLY_PRICE_ID, STRIPE_STARTER_ANNUAL_PRICE_ID]:
-            plan = "starter"
-            clips_limit = 150
-        elif price_id in [STRIPE_EXPERT_MONTHLY_PRICE_ID, STRIPE_EXPERT_ANNUAL_PRICE_ID]:
-            plan = "expert"
-            clips_limit = 250
-        
-        # Convert timestamps to ISO format
-        subscription_item = subscription['items']['data'][0]
-        current_period_start = subscription_item['current_period_start']
-        current_period_end = subscription_item['current_period_end']
-        
-        from datetime import datetime
-        start_date = datetime.fromtimestamp(current_period_start).isoformat()
-        end_date = datetime.fromtimestamp(current_period_end).isoformat()
-        
-        # Update user profile with full subscription details
-        supabase.table("user_profiles").update({
-            "plan": plan,
-            "subscription_status": subscription['status'],
-            "subscription_current_period_start": start_date,
-            "subscription_current_period_end": end_date,
-            "updated_at": datetime.now().isoformat()
-        }).eq("id", user_id).execute()
-        
-        # Update user usage limits for current month
-        await update_user_usage_limits(user_id, plan, clips_limit)
-        
-        logger.info(f"✅ Updated subscription for user {user_id} to {plan} with {clips_limit} clips limit")
+        logger.info("✅ Updated subscription for user %s to %s with %s clips limit", user_id, plan, clips_limit)
         
     except Exception as e:
-        logger.error(f"❌ Error handling subscription updated: {str(e)}")
+        logger.error("❌ Error handling subscription updated: %s", e)
+        raise
 
 async def handle_subscription_deleted(subscription):
     """Handle subscription cancellation"""
     try:
         customer_id = subscription['customer']
         
-        # Find user by customer ID
-        response = supabase.table("user_profiles").select("id").eq("stripe_customer_id", customer_id).execute()
-        
-        if not response.data:
-            logger.warning(f"⚠️ No user found for customer {customer_id}")
-            return
-        
-        user_id = response.data[0]["id"]
-        
-        from datetime import datetime
-        
-        # Downgrade to free plan and clear subscription data
-        supabase.table("user_profiles").update({
+        # Downgrade the customer's profile to free plan, clear subscription data and drop to free tier usage
+        user_id = await _apply_customer_plan(customer_id, {
             "plan": "free",
             "subscription_status": "canceled",
             "stripe_subscription_id": None,
             "subscription_current_period_start": None,
             "subscription_current_period_end": None,
-            "updated_at": datetime.now().isoformat()
-        }).eq("id", user_id).execute()
+            "updated_at": _utcnow_iso()
+        }, "free", CLIPS_LIMIT_BY_PLAN["free"], invalidate_subscription_summary(subscription['id']))
         
-        # Update user usage limits to free tier
-        await update_user_usage_limits(user_id, "free", 3)
+        if not user_id:
+            logger.warning("⚠️ No user found for customer %s", customer_id)
+            return
         
-        logger.info(f"✅ Downgraded user {user_id} to free plan")
+        logger.info("✅ Downgraded user %s to free plan", user_id)
         
     except Exception as e:
-        logger.error(f"❌ Error handling subscription deleted: {str(e)}")
+        logger.error("❌ Error handling subscription deleted: %s", e)
+        raise
 
 async def update_user_usage_limits(user_id: str, plan: str, clips_limit: int):
     """Update user usage limits for current month"""
     try:
-        from datetime import datetime
-        current_month = datetime.now().strftime("%Y-%m")
-        
-        # Check if usage record exists for current month
-        response = supabase.table("user_usage").select("*").eq("user_id", user_id).eq("month", current_month).execute()
+        # One clock read; the month key stays in local time to match the usage tracker
+        now = datetime.now(timezone.utc)
+        current_month = now.astimezone().strftime("%Y-%m")
+        now_iso = now.isoformat()
+        
+        # Update the month's record in one round trip when it exists, which keeps its usage count
+        response = await _usage().update({
+            "clips_limit": clips_limit,
+            "plan": plan,
+            "updated_at": now_iso
+        }).eq("user_id", user_id).eq("month", current_month).execute()
         
         if response.data:
-            # Update existing record
-            supabase.table("user_usage").update({
-                "clips_limit": clips_limit,
-                "plan": plan,
-                "updated_at": datetime.now().isoformat()
-            }).eq("user_id", user_id).eq("month", current_month).execute()
-            
-            logger.info(f"✅ Updated usage limits for user {user_id} - {current_month}: {clips_limit} clips")
-        else:
-            # Create new usage record for current month
-            supabase.table("user_usage").insert({
-                "user_id": user_id,
-                "month": current_month,
-                "clips_created": 0,
-                "clips_limit": clips_limit,
-                "plan": plan,
-                "created_at": datetime.now().isoformat(),
-                "updated_at": datetime.now().isoformat()
-            }).execute()
-            
-            logger.info(f"✅ Created usage record for user {user_id} - {current_month}: {clips_limit} clips")
+            logger.info("✅ Updated usage limits for user %s - %s: %s clips", user_id, current_month, clips_limit)
+            return
+        
+        # Create new usage record for current month
+        await _usage().insert({
+            "user_id": user_id,
+            "month": current_month,
+            "clips_created": 0,
+            "clips_limit": clips_limit,
+            "plan": plan,
+            "created_at": now_iso,
+            "updated_at": now_iso
+        }).execute()
+        
+        logger.info("✅ Created usage record for user %s - %s: %s clips", user_id, current_month, clips_limit)
             
     except Exception as e:
-        logger.error(f"❌ Error updating user usage limits: {str(e)}")
-        # Don't raise - this is not critical enough to fail the webhook
+        logger.error("❌ Error updating user usage limits: %s", e)
+        # Raise so the calling webhook handler fails and its event can be processed again
+        raise
 
 async def handle_payment_intent_succeeded(payment_intent):
     """Handle successful one-time payment"""
     try:
-        logger.info(f"💳 Payment succeeded: {payment_intent['id']}")
+        logger.info("💳 Payment succeeded: %s", payment_intent['id'])
         # Log successful payment - you might want to send confirmation email
         # Usually handled by checkout.session.completed for subscriptions
         
     except Exception as e:
-        logger.error(f"❌ Error handling payment_intent.succeeded: {str(e)}")
+        logger.error("❌ Error handling payment_intent.succeeded: %s", e)
+        raise
 
 async def handle_payment_intent_failed(payment_intent):
     """Handle failed one-time payment"""
     try:
-        logger.info(f"💳 Payment failed: {payment_intent['id']}")
+        logger.info("💳 Payment failed: %s", payment_intent['id'])
         # Log failed payment, send notification to user
         # You might want to update user about payment failure
         
     except Exception as e:
-        logger.error(f"❌ Error handling payment_intent.payment_failed: {str(e)}")
+        logger.error("❌ Error handling payment_intent.payment_failed: %s", e)
+        raise
 
 async def handle_subscription_created(subscription):
     """Handle new subscription creation - similar to checkout.session.completed"""
     try:
-        logger.info(f"🎉 New subscription created: {subscription['id']}")
+        logger.info("🎉 New subscription created: %s", subscription['id'])
+        # Not mirrored: the created payload is usually still "incomplete" and can arrive after
+        # checkout.session.completed has mirrored the live, active subscription
         # This is essentially the same as checkout.session.completed
         # You can reuse the same logic or call handle_checkout_completed
         # For now, just log it since checkout.session.completed handles the main logic
         
     except Exception as e:
-        logger.error(f"❌ Error handling customer.subscription.created: {str(e)}")
+        logger.error("❌ Error handling customer.subscription.created: %s", e)
+        raise
 
 async def handle_invoice_payment_succeeded(invoice):
     """Handle successful recurring payment"""
     try:
-        logger.info(f"📄 Invoice payment succeeded: {invoice['id']}")
+        logger.info("📄 Invoice payment succeeded: %s", invoice['id'])
         subscription_id = invoice.get('subscription')
         
         if subscription_id:
@@ -937,44 +1229,58 @@ async def handle_invoice_payment_succeeded(invoice):
             # Reset monthly usage if it's a new billing period
             customer_id = invoice['customer']
             
-            # Find user by customer ID
-            response = supabase.table("user_profiles").select("id, plan").eq("stripe_customer_id", customer_id).execute()
+            # Find user by customer ID, usually cached by the subscription events of the same renewal
+            user = _get_cached_customer_user(customer_id)
+            if user is None:
+                response = await _profiles().select("id, plan").eq("stripe_customer_id", customer_id).execute()
+                if response.data:
+                    user = (response.data[0]["id"], response.data[0]["plan"])
+                    _cache_customer_user(customer_id, *user)
             
-            if response.data:
-                user_id = response.data[0]["id"]
-                current_plan = response.data[0]["plan"]
+            if user:
+                user_id, current_plan = user
                 
                 # Determine clips limit based on plan
-                clips_limit = 50 if current_plan == "hobby" else 150 if current_plan == "pro" else 250
+                clips_limit = CLIPS_LIMIT_BY_PLAN.get(current_plan, DEFAULT_PLAN[1])
                 
                 # Reset usage for new billing period
                 await update_user_usage_limits(user_id, current_plan, clips_limit)
-                logger.info(f"✅ Reset usage limits for user {user_id} - new billing period")
+                logger.info("✅ Reset usage limits for user %s - new billing period", user_id)
         
     except Exception as e:
-        logger.error(f"❌ Error handling invoice.payment_succeeded: {str(e)}")
+        logger.error("❌ Error handling invoice.payment_succeeded: %s", e)
+        raise
 
 async def handle_invoice_payment_failed(invoice):
     """Handle failed recurring payment"""
     try:
-        logger.info(f"📄 Invoice payment failed: {invoice['id']}")
+        logger.info("📄 Invoice payment failed: %s", invoice['id'])
         customer_id = invoice['customer']
         
-        # Find user by customer ID
-        response = supabase.table("user_profiles").select("id").eq("stripe_customer_id", customer_id).execute()
+        # Mark the customer's subscription as past_due
+        response = await _profiles().update({
+            "subscription_status": "past_due",
+            "updated_at": _utcnow_iso()
+        }).eq("stripe_customer_id", customer_id).execute()
         
         if response.data:
             user_id = response.data[0]["id"]
-            
-            # Update subscription status to past_due
-            from datetime import datetime
-            supabase.table("user_profiles").update({
-                "subscription_status": "past_due",
-                "updated_at": datetime.now().isoformat()
-            }).eq("id", user_id).execute()
-            
-            logger.info(f"⚠️ Marked user {user_id} subscription as past_due")
+            _cache_customer_user(customer_id, user_id, response.data[0]["plan"])
+            logger.info("⚠️ Marked user %s subscription as past_due", user_id)
             # You might want to send email notification here
         
     except Exception as e:
-        logger.error(f"❌ Error handling invoice.payment_failed: {str(e)}")
+        logger.error("❌ Error handling invoice.payment_failed: %s", e)
+        raise
+
+# Webhook event type -> handler for the event's data object
+WEBHOOK_HANDLERS = {
+    'checkout.session.completed': handle_checkout_completed,
+    'customer.subscription.updated': handle_subscription_updated,
+    'customer.subscription.deleted': handle_subscription_deleted,
+    'payment_intent.succeeded': handle_payment_intent_succeeded,
+    'payment_intent.payment_failed': handle_payment_intent_failed,
+    'customer.subscription.created': handle_subscription_created,
+    'invoice.payment_succeeded': handle_invoice_payment_succeeded,
+    'invoice.payment_failed': handle_invoice_payment_failed,
+}
@@ -1,11 +1,22 @@
 import os
+import io
+import re
+import json
+import csv
+import wave
+import time
 import logging
 import asyncio
+import threading
 import tempfile
+import concurrent.futures
 import subprocess
 from typing import Dict, Any, List, Optional
 import uuid
+import aiofiles
 from datetime import datetime
+from itertools import accumulate
+from operator import itemgetter
 
 # Import global FFmpeg configuration first
 from .ffmpeg_config import FFmpegConfig
@@ -24,9 +35,135 @@ except ImportError:
     openai = None
     CLIENT_TYPE = None
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+    orjson = None
+
+try:
+    import h2  # noqa: F401 - enables HTTP/2 in httpx
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
+_json_loads = orjson.loads if ORJSON_AVAILABLE else json.loads
+
+# Keywords that boost quote and energy scores, matched as whole words in one C-level scan
+EMOTIONAL_WORDS_RE = re.compile(r'\b(amazing|incredible|shocking|unbelievable)\b', re.IGNORECASE)
+ENERGY_WORDS_RE = re.compile(r'\b(yes|no|stop|go|now|amazing)\b', re.IGNORECASE)
+
+def _count_keywords(pattern: re.Pattern, text: str) -> int:
+    """Number of distinct keywords of a pattern that appear in the text"""
+    return len({match.lower() for match in pattern.findall(text)})
+
+def _as_dict(obj: Any) -> Dict[str, Any]:
+    """Plain dict view of an API response object (pydantic model in v1, dict in v0)"""
+    return obj if isinstance(obj, dict) else obj.model_dump()
+
+def _word_entry(word: Dict[str, Any]) -> Dict[str, Any]:
+    """Word timing in the shape downstream caption code expects"""
+    return {'start': word['start'], 'end': word['end'], 'text': word['word'], 'word': word['word']}
+
+def _parse_transcription(response: Any) -> Dict[str, Any]:
+    """Normalize a verbose_json transcription response into text, segments and words"""
+    data = _as_dict(response)
+    segments = []
+    words = []
+    
+    for segment in data.get('segments') or ():
+        segment_words = [_word_entry(word) for word in segment.get('words') or ()]
+        words.extend(segment_words)
+        segments.append({
+            'start': segment['start'],
+            'end': segment['end'],
+            'text': segment['text'],
+            'words': segment_words
+        })
+    
+    # Top-level words repeat any per-segment ones, so only fall back to them when segments had none
+    if not words:
+        words.extend(_word_entry(word) for word in data.get('words') or ())
+    
+    return {
+        'text': data.get('text') or '',
+        'segments': segments,
+        'words': words
+    }
+
+# Bounded pool for blocking fallbacks so bursts don't drain the loop's default executor
+_io_executor = concurrent.futures.ThreadPoolExecutor(
+    max_workers=2,
+    thread_name_prefix="whisper-io"
+)
+
+# v1 clients keyed by event loop: jobs run on their own short-lived loops and pooled
+# connections can't be shared across them, but every service on one loop shares a client
+_openai_clients: Dict[asyncio.AbstractEventLoop, "openai.AsyncOpenAI"] = {}
+_openai_clients_lock = threading.Lock()
+
+def _get_openai_client(api_key: str) -> "openai.AsyncOpenAI":
+    """Return the running event loop's v1 client, creating it on first use"""
+    loop = asyncio.get_running_loop()
+    with _openai_clients_lock:
+        # Clients of loops that closed without calling close_connections() can't be reused, only dropped
+        for stale_loop in [owner for owner in _openai_clients if owner.is_closed()]:
+            del _openai_clients[stale_loop]
+        
+        client = _openai_clients.get(loop)
+        if client is None:
+            client = _openai_clients[loop] = _create_openai_client(api_key)
+        return client
+
+def _create_openai_client(api_key: str) -> "openai.AsyncOpenAI":
+    """Build a v1 client over a pooled async HTTP client"""
+    import httpx
+    import certifi
+    
+    # Create robust async HTTP client with proper SSL and timeout settings.
+    # Over HTTP/2 parallel chunks multiplex on one TLS connection, and the long
+    # keep-alive lets the connection opened by the health check serve later files too
+    http_client = httpx.AsyncClient(
+        http2=HTTP2_AVAILABLE,
+        verify=certifi.where(),
+        timeout=httpx.Timeout(60.0, connect=10.0),  # 60s total, 10s connect
+        limits=httpx.Limits(
+            max_connections=5,
+            max_keepalive_connections=2,
+            keepalive_expiry=300.0
+        )
+    )
+    
+    client = openai.AsyncOpenAI(
+        api_key=api_key,
+        http_client=http_client,
+        max_retries=3,
+        timeout=60.0
+    )
+    logger.info("✅ OpenAI v1.x async client initialized with robust settings")
+    return client
+
+async def close_connections():
+    """Close the OpenAI HTTP client owned by the running event loop, if one was created"""
+    with _openai_clients_lock:
+        client = _openai_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.close()
+        logger.info("🔌 OpenAI HTTP client closed")
+
 class TranscriptionService:
+    # Chunks transcribed in parallel; matches the HTTP client's connection pool
+    MAX_PARALLEL_CHUNKS = 5
+    # Whisper works on 16kHz audio, so extracted audio and chunks are resampled to it
+    SAMPLE_RATE = 16000
+    # A passed connection health check is trusted for this long (seconds)
+    HEALTH_CHECK_TTL = 60
+    # Shared across instances, so new services don't re-probe a healthy API
+    _last_health_ok_at = 0.0
+
     def __init__(self):
         logger.info("🔧 Initializing TranscriptionService...")
 
@@ -37,8 +174,10 @@ class TranscriptionService:
         else:
             logger.warning("⚠️ FFmpeg not configured - transcription may fail")
         
-        self.client = None
-        self.http_client = None
+        self._api_key = None
+        self._legacy_client = None
+        # Chunk path -> duration in seconds, recorded when audio is split
+        self._duration_cache: Dict[str, float] = {}
         self.temp_dir = os.getenv('TEMP_DIR', 'temp')
         os.makedirs(self.temp_dir, exist_ok=True)
         
@@ -54,30 +193,13 @@ class TranscriptionService:
         
         try:
             if CLIENT_TYPE == 'v1':
-                import httpx
-                import certifi
-                
-                # Create robust HTTP client with proper SSL and timeout settings
-                self.http_client = httpx.Client(
-                    verify=certifi.where(),
-                    timeout=httpx.Timeout(60.0, connect=10.0),  # 60s total, 10s connect
-                    limits=httpx.Limits(
-                        max_connections=5,
-                        max_keepalive_connections=2,
-                        keepalive_expiry=30.0
-                    )
-                )
-                
-                self.client = openai.OpenAI(
-                    api_key=api_key,
-                    http_client=self.http_client,
-                    max_retries=3,
-                    timeout=60.0
-                )
-                logger.info("✅ OpenAI v1.x client initialized with robust settings")
+                # The client itself is resolved per event loop through the client property
+                self._api_key = api_key
+                self._do_transcribe = self._transcribe_v1
             elif CLIENT_TYPE == 'v0':
                 openai.api_key = api_key
-                self.client = openai
+                self._legacy_client = openai
+                self._do_transcribe = self._transcribe_v0
                 logger.info("✅ OpenAI v0.x client initialized")
             else:
                 raise ValueError("Unable to determine OpenAI library version")
@@ -86,27 +208,28 @@ class TranscriptionService:
             logger.error(f"❌ Failed to initialize OpenAI client: {str(e)}")
             raise
     
-    def __del__(self):
-        """Cleanup HTTP client on destruction"""
-        if hasattr(self, 'http_client') and self.http_client:
-            try:
-                self.http_client.close()
-            except:
-                pass
+    @property
+    def client(self):
+        """OpenAI client to use on the running event loop"""
+        if self._api_key:
+            return _get_openai_client(self._api_key)
+        return self._legacy_client
     
     async def _ensure_connection_health(self):
         """Ensure the connection is healthy before making requests"""
+        if time.monotonic() - self._last_health_ok_at < self.HEALTH_CHECK_TTL:
+            logger.debug("✅ Connection health check skipped - recently healthy")
+            return True
+        
         try:
-            # Quick health check - list models with short timeout
-            def _health_check():
-                models = list(self.client.models.list())
-                return len(models) > 0
-            
-            healthy = await asyncio.get_event_loop().run_in_executor(None, _health_check)
+            # Quick health check - fetch the single Whisper model instead of paging the whole catalog
+            model = await self.client.models.retrieve("whisper-1")
+            healthy = model.id == "whisper-1"
             if not healthy:
                 logger.warning("⚠️ Connection health check failed")
                 return False
             
+            TranscriptionService._last_health_ok_at = time.monotonic()
             logger.debug("✅ Connection health check passed")
             return True
             
@@ -141,56 +264,65 @@ class TranscriptionService:
             
             logger.info(f"🎙️ Transcribing: {audio_path}")
             
-            # Validate file
-            if not os.path.exists(audio_path):
+            # Validate file with a single stat
+            try:
+                file_size = os.stat(audio_path).st_size
+            except FileNotFoundError:
                 raise FileNotFoundError(f"Audio file not found: {audio_path}")
             
-            file_size = os.path.getsize(audio_path)
             logger.info(f"📁 File size: {file_size / (1024*1024):.1f} MB")
             
             # Extract audio if needed
             audio_file_path = await self._prepare_audio(audio_path)
             
-            # Split if too large
-            audio_chunks = await self._split_audio_if_needed(audio_file_path)
+            # Split if too large; a passed-through input keeps the size already read
+            audio_chunks = await self._split_audio_if_needed(
+                audio_file_path,
+                file_size=file_size if audio_file_path == audio_path else None
+            )
+            
+            # Transcribe all chunks concurrently; each chunk's offset is the summed duration of the
+            # chunks before it, so results can be stitched in order regardless of completion order
+            semaphore = asyncio.Semaphore(self.MAX_PARALLEL_CHUNKS)
+            
+            async def _transcribe_in_slot(i: int, chunk_path: str):
+                async with semaphore:
+                    logger.info(f"🎙️ Transcribing chunk {i + 1}/{len(audio_chunks)}")
+                    return await self._transcribe_chunk(chunk_path, language)
+            
+            chunk_results, durations = await asyncio.gather(
+                asyncio.gather(
+                    *(_transcribe_in_slot(i, chunk_path) for i, chunk_path in enumerate(audio_chunks)),
+                    return_exceptions=True
+                ),
+                asyncio.gather(*(self._get_audio_duration(chunk_path) for chunk_path in audio_chunks[:-1]))
+            )
+            
+            # Cleanup chunks
+            for chunk_path in audio_chunks:
+                if chunk_path != audio_file_path:
+                    self._cleanup_file(chunk_path)
+            
+            for chunk_result in chunk_results:
+                if isinstance(chunk_result, BaseException):
+                    raise chunk_result
             
-            # Transcribe all chunks
             all_segments = []
             all_words = []
-            current_offset = 0
             
-            for i, chunk_path in enumerate(audio_chunks):
-                logger.info(f"🎙️ Transcribing chunk {i + 1}/{len(audio_chunks)}")
+            for chunk_result, current_offset in zip(chunk_results, accumulate(durations, initial=0)):
+                if not chunk_result:
+                    continue
                 
-                chunk_result = await self._transcribe_chunk(chunk_path, language)
+                segments = chunk_result.get('segments', [])
+                words = chunk_result.get('words', [])
                 
-                if chunk_result:
-                    # Adjust timestamps
-                    for segment in chunk_result.get('segments', []):
-                        segment['start'] += current_offset
-                        segment['end'] += current_offset
-                        
-                        # Adjust word timestamps
-                        if 'words' in segment:
-                            for word in segment['words']:
-                                word['start'] += current_offset
-                                word['end'] += current_offset
-                        
-                        all_segments.append(segment)
-                    
-                    # Handle top-level words
-                    for word in chunk_result.get('words', []):
-                        word['start'] += current_offset
-                        word['end'] += current_offset
-                        all_words.append(word)
-                    
-                    # Update offset
-                    chunk_duration = await self._get_audio_duration(chunk_path)
-                    current_offset += chunk_duration
+                # The first (and usually only) chunk starts at zero and needs no adjustment
+                if current_offset:
+                    self._shift_timestamps(segments, words, current_offset)
                 
-                # Cleanup chunk
-                if chunk_path != audio_file_path:
-                    self._cleanup_file(chunk_path)
+                all_segments.extend(segments)
+                all_words.extend(words)
             
             # Cleanup extracted audio
             if audio_file_path != audio_path:
@@ -198,7 +330,7 @@ class TranscriptionService:
             
             # Build final result
             result = {
-                'text': " ".join([seg['text'] for seg in all_segments]),
+                'text': " ".join(seg['text'] for seg in all_segments),
                 'segments': all_segments,
                 'words': all_words,
                 'language': language
@@ -209,75 +341,144 @@ class TranscriptionService:
             return result
             
         except Exception as e:
-            error_type = type(e).__name__
-            error_msg = str(e)
-            elapsed = (datetime.now() - start_time).total_seconds()
-            
-            # INSTANT CONSOLE ERROR - Critical transcription failure
-            instant_error_msg = f"\n🚨 INSTANT TRANSCRIPTION CRITICAL ERROR! 🚨\n🎤 Audio Path: {audio_path}\n🔙 Language: {language}\n⏰ Elapsed Time: {elapsed:.2f}s\n🔧 Error Type: {error_type}\n💬 Error Message: {error_msg}\n❌ Issue: Critical failure in transcription service\n🔍 This indicates API issues, network problems, or audio processing failures\n📁 Fallback: Video clips will be generated without captions\n" + "="*80
-            
-            # Log to both console and log file
-            print(instant_error_msg)
-            logger.error(f"🚨 INSTANT ERROR: {instant_error_msg}")
-            
-            logger.error(f"❌ Transcription error: {str(e)}")
+            self._log_fallback(
+                logging.ERROR, "CRITICAL ERROR",
+                audio_path=audio_path, language=language,
+                elapsed=f"{(datetime.now() - start_time).total_seconds():.2f}s",
+                error_type=type(e).__name__, error=e,
+                result="clips will be generated without captions"
+            )
             raise
     
+    async def _run_ffmpeg(self, *args: str):
+        """Run ffmpeg as an async subprocess, raising with its error output on failure"""
+        process = await asyncio.create_subprocess_exec(
+            FFmpegConfig.get_ffmpeg_path() or 'ffmpeg', '-hide_banner', '-loglevel', 'error', '-y', *args,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE
+        )
+        _, stderr = await process.communicate()
+        if process.returncode != 0:
+            raise RuntimeError(f"ffmpeg exited with code {process.returncode}: {stderr.decode(errors='replace').strip()[-500:]}")
+    
+    def _is_whisper_wav(self, audio_path: str) -> bool:
+        """Whether a file is already mono 16-bit PCM WAV at the Whisper sample rate, judged from its header"""
+        if not audio_path.lower().endswith('.wav'):
+            return False
+        try:
+            with wave.open(audio_path, 'rb') as wav_file:
+                return (
+                    wav_file.getframerate() == self.SAMPLE_RATE
+                    and wav_file.getnchannels() == 1
+                    and wav_file.getsampwidth() == 2
+                )
+        except (wave.Error, EOFError, OSError):
+            return False
+    
     async def _prepare_audio(self, video_path: str) -> str:
         """Extract audio from video if needed"""
         try:
-            # Check if already audio
-            if video_path.lower().endswith(('.mp3', '.wav', '.m4a', '.aac')):
+            # Already-normalized WAV goes through untouched; other WAV layouts get resampled below
+            if self._is_whisper_wav(video_path):
                 return video_path
             
-            logger.info("🎵 Extracting audio from video")
+            # Compressed audio formats are accepted by Whisper as-is
+            if video_path.lower().endswith(('.mp3', '.m4a', '.aac')):
+                return video_path
             
-            def _extract():
-                audio = AudioSegment.from_file(video_path)
-                audio_path = os.path.join(self.temp_dir, f"audio_{os.getpid()}.wav")
-                
-                # Convert to mono 16kHz for optimal Whisper performance
-                audio = audio.set_channels(1)
-                audio = audio.set_frame_rate(16000)
-                audio.export(audio_path, format="wav")
-                
-                return audio_path
+            logger.info("🎵 Extracting audio from video")
             
-            return await asyncio.get_event_loop().run_in_executor(None, _extract)
+            # Stream straight from the video to mono 16kHz PCM for optimal Whisper performance
+            audio_path = os.path.join(self.temp_dir, f"audio_{os.getpid()}_{uuid.uuid4().hex[:8]}.wav")
+            await self._run_ffmpeg(
+                '-i', video_path,
+                '-vn', '-ac', '1', '-ar', str(self.SAMPLE_RATE), '-c:a', 'pcm_s16le', '-f', 'wav',
+                audio_path
+            )
+            return audio_path
             
         except Exception as e:
             logger.error(f"❌ Audio extraction error: {str(e)}")
             raise
     
-    async def _split_audio_if_needed(self, audio_path: str, max_size_mb: int = 24) -> List[str]:
+    async def _split_audio_if_needed(self, audio_path: str, max_size_mb: int = 24, file_size: Optional[int] = None) -> List[str]:
         """Split audio into chunks if too large"""
         try:
-            file_size_mb = os.path.getsize(audio_path) / (1024 * 1024)
+            if file_size is None:
+                file_size = os.path.getsize(audio_path)
+            file_size_mb = file_size / (1024 * 1024)
             
             if file_size_mb <= max_size_mb:
                 return [audio_path]
             
             logger.info(f"✂️ Splitting audio ({file_size_mb:.1f} MB > {max_size_mb} MB)")
             
-            def _split():
-                audio = AudioSegment.from_file(audio_path)
-                chunk_duration_ms = int((max_size_mb / file_size_mb) * len(audio) * 0.9)
-                
-                chunks = []
-                for i in range(0, len(audio), chunk_duration_ms):
-                    chunk = audio[i:i + chunk_duration_ms]
-                    chunk_path = os.path.join(self.temp_dir, f"chunk_{os.getpid()}_{len(chunks)}.wav")
-                    chunk.export(chunk_path, format="wav")
+            # Chunks are written as mono 16-bit PCM, so their size follows directly from their length
+            segment_seconds = int(max_size_mb * 1024 * 1024 * 0.9 / (self.SAMPLE_RATE * 2))
+            chunk_prefix = f"chunk_{os.getpid()}_{uuid.uuid4().hex[:8]}_"
+            segment_list_path = os.path.join(self.temp_dir, f"{chunk_prefix}list.csv")
+            
+            # Audio we extracted is already mono 16kHz PCM, so its samples are copied, not re-encoded
+            if self._is_whisper_wav(audio_path):
+                codec_args = ('-c', 'copy')
+            else:
+                codec_args = ('-vn', '-ac', '1', '-ar', str(self.SAMPLE_RATE), '-c:a', 'pcm_s16le')
+            
+            await self._run_ffmpeg(
+                '-i', audio_path,
+                *codec_args,
+                '-f', 'segment', '-segment_time', str(segment_seconds),
+                '-segment_list', segment_list_path, '-segment_list_type', 'csv',
+                os.path.join(self.temp_dir, f"{chunk_prefix}%03d.wav")
+            )
+            
+            # The segment list gives each chunk's start and end time, so durations are known
+            # without decoding the chunks again
+            chunks = []
+            with open(segment_list_path, newline='') as segment_list:
+                for name, start, end in csv.reader(segment_list):
+                    chunk_path = os.path.join(self.temp_dir, name)
+                    self._duration_cache[chunk_path] = float(end) - float(start)
                     chunks.append(chunk_path)
-                
-                return chunks
+            self._cleanup_file(segment_list_path)
             
-            return await asyncio.get_event_loop().run_in_executor(None, _split)
+            return chunks
             
         except Exception as e:
             logger.error(f"❌ Audio split error: {str(e)}")
             return [audio_path]
     
+    async def _transcribe_v1(self, audio_path: str, language: str) -> Dict[str, Any]:
+        """Transcribe one file with the v1 async client"""
+        async with aiofiles.open(audio_path, 'rb') as audio_file:
+            audio_data = await audio_file.read()
+        
+        # Decode the raw body straight to dicts; the pydantic models would only be dumped again
+        raw_response = await self.client.audio.transcriptions.with_raw_response.create(
+            model="whisper-1",
+            file=(os.path.basename(audio_path), audio_data),
+            language=language,
+            response_format="verbose_json",
+            timestamp_granularities=["word", "segment"]
+        )
+        return _parse_transcription(_json_loads(raw_response.http_response.content))
+    
+    async def _transcribe_v0(self, audio_path: str, language: str) -> Dict[str, Any]:
+        """Transcribe one file with the legacy v0 module-level API"""
+        async with aiofiles.open(audio_path, 'rb') as audio_file:
+            audio_data = await audio_file.read()
+        
+        # v0 uploads take a named file object
+        upload = io.BytesIO(audio_data)
+        upload.name = os.path.basename(audio_path)
+        response = await self.client.Audio.atranscribe(
+            "whisper-1",
+            upload,
+            language=language,
+            response_format="verbose_json"
+        )
+        return _parse_transcription(response)
+    
     async def _transcribe_chunk(self, audio_path: str, language: str) -> Dict[str, Any]:
         """Transcribe a single audio chunk with retry logic"""
         max_retries = 3
@@ -287,90 +488,28 @@ class TranscriptionService:
             try:
                 logger.info(f"🎙️ Transcription attempt {attempt + 1}/{max_retries}")
                 
-                def _transcribe():
-                    with open(audio_path, 'rb') as audio_file:
-                        if CLIENT_TYPE == 'v1':
-                            response = self.client.audio.transcriptions.create(
-                                model="whisper-1",
-                                file=audio_file,
-                                language=language,
-                                response_format="verbose_json",
-                                timestamp_granularities=["word", "segment"]
-                            )
-                        
-                        # Process v1 response
-                        segments = []
-                        words = []
-                        
-                        for segment in response.segments:
-                            seg_data = {
-                                'start': segment.start,
-                                'end': segment.end,
-                                'text': segment.text,
-                                'words': []
-                            }
-                            
-                            # Add word data to segment if available
-                            if hasattr(segment, 'words'):
-                                for word in segment.words:
-                                    word_data = {
-                                        'start': word.start,
-                                        'end': word.end,
-                                        'text': word.word,
-                                        'word': word.word
-                                    }
-                                    seg_data['words'].append(word_data)
-                                    words.append(word_data)
-                            
-                            segments.append(seg_data)
-                        
-                        # Also collect top-level words if available
-                        if hasattr(response, 'words') and response.words:
-                            for word in response.words:
-                                words.append({
-                                    'start': word.start,
-                                    'end': word.end,
-                                    'text': word.word,
-                                    'word': word.word
-                                })
-                        
-                        return {
-                            'text': response.text,
-                            'segments': segments,
-                            'words': words
-                        }
-                
                 # Add timeout protection to transcription
                 return await asyncio.wait_for(
-                    asyncio.get_event_loop().run_in_executor(None, _transcribe),
+                    self._do_transcribe(audio_path, language),
                     timeout=120  # 2 minute timeout per chunk
                 )
                 
             except asyncio.TimeoutError:
-                logger.warning(f"⚠️ Transcription chunk timed out on attempt {attempt + 1}")
-                
-                # INSTANT CONSOLE ERROR - Transcription Timeout Fallback
-                print(f"\n🚨 INSTANT TRANSCRIPTION TIMEOUT FALLBACK! 🚨")
-                print(f"🎙️ Attempt: {attempt + 1}/{max_retries}")
-                print(f"⏰ Timeout Duration: 2 minutes (120 seconds)")
-                print(f"📁 Audio Chunk: {audio_path}")
-                print(f"🔄 Fallback Reason: Transcription API took too long to respond")
-                
                 if attempt < max_retries - 1:
-                    print(f"💡 Next Strategy: Will retry with exponential backoff ({retry_delay}s delay)")
-                    print(f"⚡ Retrying transcription in {retry_delay} seconds...")
-                    print("="*80)
-                    
-                    logger.info(f"🔄 Retrying in {retry_delay} seconds...")
+                    self._log_fallback(
+                        logging.WARNING, "TIMEOUT FALLBACK",
+                        attempt=f"{attempt + 1}/{max_retries}", chunk=audio_path, timeout="120s",
+                        next_step=f"retry in {retry_delay}s"
+                    )
                     await asyncio.sleep(retry_delay)
                     retry_delay *= 2  # Exponential backoff
                     continue
                 else:
-                    print(f"❌ Final timeout after {max_retries} attempts - transcription failed")
-                    print(f"💡 Fallback Result: Clips will be generated without captions/subtitles")
-                    print("="*80)
-                    
-                    logger.error(f"❌ Transcription chunk timed out after {max_retries} attempts")
+                    self._log_fallback(
+                        logging.ERROR, "TIMEOUT FAILURE",
+                        attempt=f"{attempt + 1}/{max_retries}", chunk=audio_path, timeout="120s",
+                        result="clips will be generated without captions"
+                    )
                     raise Exception("Transcription timed out after multiple attempts")
             except Exception as e:
                 error_str = str(e).lower()
@@ -384,54 +523,64 @@ class TranscriptionService:
                 is_retryable = any(err in error_str for err in retryable_errors)
                 
                 if attempt < max_retries - 1 and is_retryable:
-                    logger.warning(f"⚠️ Retryable error on attempt {attempt + 1}: {str(e)}")
-                    
-                    # INSTANT CONSOLE ERROR - Transcription Retryable Error Fallback
-                    print(f"\n🚨 INSTANT TRANSCRIPTION RETRY FALLBACK! 🚨")
-                    print(f"🎙️ Attempt: {attempt + 1}/{max_retries}")
-                    print(f"🔧 Error Type: {type(e).__name__}")
-                    print(f"💬 Error Message: {str(e)}")
-                    print(f"📁 Audio Chunk: {audio_path}")
-                    print(f"🔄 Fallback Reason: Network/connection issue - will retry with backoff")
-                    
-                    if 'ssl' in error_str:
-                        print("💡 Issue: SSL/TLS connection error - network security issue")
-                    elif 'connection' in error_str:
-                        print("💡 Issue: Network connection problem - temporary connectivity issue")
-                    elif 'timeout' in error_str:
-                        print("💡 Issue: Request timeout - slow network or API overload")
-                    elif 'network' in error_str:
-                        print("💡 Issue: General network error - connectivity problem")
-                    
-                    print(f"⚡ Next Strategy: Will retry in {retry_delay} seconds with exponential backoff")
-                    print("="*80)
-                    
-                    logger.info(f"🔄 Retrying in {retry_delay} seconds...")
+                    self._log_fallback(
+                        logging.WARNING, "RETRY FALLBACK",
+                        attempt=f"{attempt + 1}/{max_retries}", chunk=audio_path,
+                        error_type=type(e).__name__, error=e, next_step=f"retry in {retry_delay}s"
+                    )
                     await asyncio.sleep(retry_delay)
                     retry_delay *= 2  # Exponential backoff
                     continue
                 else:
-                    # INSTANT CONSOLE ERROR - Final Transcription Failure
-                    print(f"\n🚨 INSTANT TRANSCRIPTION FINAL FAILURE! 🚨")
-                    print(f"🎙️ Final Attempt: {attempt + 1}/{max_retries}")
-                    print(f"🔧 Error Type: {type(e).__name__}")
-                    print(f"💬 Error Message: {str(e)}")
-                    print(f"📁 Audio Chunk: {audio_path}")
-                    print(f"❌ All retry attempts exhausted")
-                    print(f"💡 Fallback Result: Clips will be generated without captions/subtitles")
-                    print("="*80)
-                    
-                    logger.error(f"❌ Chunk transcription error (attempt {attempt + 1}): {str(e)}")
+                    self._log_fallback(
+                        logging.ERROR, "FINAL FAILURE",
+                        attempt=f"{attempt + 1}/{max_retries}", chunk=audio_path,
+                        error_type=type(e).__name__, error=e,
+                        result="clips will be generated without captions"
+                    )
                     raise
     
+    @staticmethod
+    def _log_fallback(level: int, kind: str, **context: Any):
+        """Log a transcription fallback as one record, building the context string only if it will be emitted"""
+        if logger.isEnabledFor(level):
+            logger.log(level, "🚨 INSTANT TRANSCRIPTION %s: %s", kind, ", ".join(f"{key}={value}" for key, value in context.items()))
+    
+    @staticmethod
+    def _shift_timestamps(segments: List[Dict[str, Any]], words: List[Dict[str, Any]], offset: float):
+        """Move a chunk's segment and word timestamps by its offset, touching each dict once"""
+        # Segment words are also listed in the top-level words, so dedupe by identity
+        timed = {id(segment): segment for segment in segments}
+        for segment in segments:
+            for word in segment.get('words', ()):
+                timed[id(word)] = word
+        for word in words:
+            timed[id(word)] = word
+        
+        for item in timed.values():
+            item['start'] += offset
+            item['end'] += offset
+    
     async def _get_audio_duration(self, audio_path: str) -> float:
         """Get audio duration in seconds"""
+        cached_duration = self._duration_cache.get(audio_path)
+        if cached_duration is not None:
+            return cached_duration
+        
+        # PCM WAV (everything this service extracts or splits) carries its length in the header
+        if audio_path.lower().endswith('.wav'):
+            try:
+                with wave.open(audio_path, 'rb') as wav_file:
+                    return wav_file.getnframes() / float(wav_file.getframerate())
+            except (wave.Error, EOFError) as e:
+                logger.debug(f"WAV header unreadable for {audio_path}, decoding instead: {str(e)}")
+        
         try:
             def _get_duration():
                 audio = AudioSegment.from_file(audio_path)
                 return len(audio) / 1000.0
             
-            return await asyncio.get_event_loop().run_in_executor(None, _get_duration)
+            return await asyncio.get_running_loop().run_in_executor(_io_executor, _get_duration)
             
         except Exception as e:
             logger.error(f"❌ Duration error: {str(e)}")
@@ -439,6 +588,7 @@ class TranscriptionService:
     
     def _cleanup_file(self, file_path: str):
         """Clean up temporary file"""
+        self._duration_cache.pop(file_path, None)
         try:
             if os.path.exists(file_path):
                 os.remove(file_path)
@@ -462,16 +612,14 @@ class TranscriptionService:
                 # Scoring logic
                 if 5 <= word_count <= 15:
                     score += 20
-                if text.endswith('?'):
+                last_char = text[-1]
+                if last_char == '?':
                     score += 15
-                if text.endswith('!'):
+                elif last_char == '!':
                     score += 10
                 
                 # Check for emotional words
-                emotional_words = ['amazing', 'incredible', 'shocking', 'unbelievable']
-                for word in emotional_words:
-                    if word in text.lower():
-                        score += 15
+                score += 15 * _count_keywords(EMOTIONAL_WORDS_RE, text)
                 
                 if score >= 20:
                     quotable_moments.append({
@@ -481,7 +629,8 @@ class TranscriptionService:
                         'score': score
                     })
             
-            return sorted(quotable_moments, key=lambda x: x['score'], reverse=True)
+            quotable_moments.sort(key=itemgetter('score'), reverse=True)
+            return quotable_moments
             
         except Exception as e:
             logger.error(f"❌ Error finding quotes: {str(e)}")
@@ -506,10 +655,7 @@ class TranscriptionService:
                 energy_score += text.count('!') * 15
                 
                 # High-energy words
-                energy_words = ['yes', 'no', 'stop', 'go', 'now', 'amazing']
-                for word in energy_words:
-                    if word.lower() in text.lower():
-                        energy_score += 10
+                energy_score += 10 * _count_keywords(ENERGY_WORDS_RE, text)
                 
                 if energy_score >= 15:
                     energy_moments.append({
@@ -519,7 +665,8 @@ class TranscriptionService:
                         'energy_score': energy_score
                     })
             
-            return sorted(energy_moments, key=lambda x: x['energy_score'], reverse=True)
+            energy_moments.sort(key=itemgetter('energy_score'), reverse=True)
+            return energy_moments
             
         except Exception as e:
             logger.error(f"❌ Error detecting energy: {str(e)}")
@@ -528,9 +675,9 @@ class TranscriptionService:
     async def test_api_connection(self) -> Dict[str, Any]:
         """Test OpenAI API connection"""
         try:
-            def _test():
+            async def _test():
                 if CLIENT_TYPE == 'v1':
-                    models = list(self.client.models.list())
+                    models = [model async for model in self.client.models.list()]
                     whisper_models = [m for m in models if 'whisper' in m.id.lower()]
                     return {
                         "success": True,
@@ -541,7 +688,7 @@ class TranscriptionService:
                 else:
                     raise ValueError("OpenAI v0.x not supported for production")
             
-            return await asyncio.get_event_loop().run_in_executor(None, _test)
+            return await _test()
             
         except Exception as e:
             return {
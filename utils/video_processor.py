@@ -8,6 +8,7 @@ import json
 from datetime import datetime
 import tempfile
 import uuid
+from collections import deque
 from PIL import Image, ImageDraw, ImageFont
 
 # Import FFmpeg configuration first
@@ -1074,7 +1075,7 @@ class VideoProcessor:
                 return True
             
             # Write SRT file
-            with open(srt_file, 'w', encoding='utf-8') as f:
+            with open(srt_file, 'w', encoding='utf-8', buffering=1 << 20) as f:
                 f.write(srt_content)
             
             logger.info(f"📄 Created SRT file: {srt_file}")
@@ -1102,14 +1103,8 @@ class VideoProcessor:
                     threads=0  # Use all CPU cores
                 )
                 
-                def _run_ffmpeg():
-                    ffmpeg.run(output, overwrite_output=True, capture_stdout=True, capture_stderr=True)
-                
                 # Add timeout protection
-                await asyncio.wait_for(
-                    asyncio.get_event_loop().run_in_executor(None, _run_ffmpeg),
-                    timeout=480  # 8 minute timeout for subtitle processing
-                )
+                await self._run_ffmpeg_streaming(output, timeout=480)  # 8 minute timeout for subtitle processing
                 
                 logger.info("✅ Captions added successfully with SRT subtitles")
                 return True
@@ -1130,9 +1125,46 @@ class VideoProcessor:
             logger.error(f"❌ Error adding captions with FFmpeg: {str(e)}")
             return False
     
+    async def _run_ffmpeg_streaming(self, output, timeout: float):
+        """Run an ffmpeg graph as an async subprocess, draining stderr incrementally instead of buffering it"""
+        args = ffmpeg.compile(output, overwrite_output=True)
+        process = await asyncio.create_subprocess_exec(
+            *args,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE
+        )
+        
+        # Keep only the tail of ffmpeg's log for error reporting
+        stderr_tail = deque(maxlen=20)
+        
+        async def _drain_stderr():
+            pending = ""
+            while True:
+                chunk = await process.stderr.read(4096)
+                if not chunk:
+                    break
+                pending += chunk.decode(errors='replace').replace('\r', '\n')
+                *lines, pending = pending.split('\n')
+                for line in lines:
+                    if line.strip():
+                        stderr_tail.append(line)
+                        logger.debug("ffmpeg: %s", line)
+            if pending.strip():
+                stderr_tail.append(pending)
+        
+        try:
+            await asyncio.wait_for(asyncio.gather(_drain_stderr(), process.wait()), timeout=timeout)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            raise
+        
+        if process.returncode != 0:
+            raise RuntimeError(f"ffmpeg exited with code {process.returncode}: {' | '.join(stderr_tail)}")
+    
     def _create_srt_content(self, transcription_segments: List[TranscriptionSegment]) -> str:
         """Create SRT subtitle content from transcription segments"""
-        srt_content = ""
+        srt_parts = []
         subtitle_index = 1
         
         for segment in transcription_segments:
@@ -1146,28 +1178,26 @@ class VideoProcessor:
                     start_time = self._seconds_to_srt_time(word.start)
                     end_time = self._seconds_to_srt_time(word.end)
                     
-                    srt_content += f"{subtitle_index}\n"
-                    srt_content += f"{start_time} --> {end_time}\n"
-                    srt_content += f"{word_text}\n\n"
+                    srt_parts.append(f"{subtitle_index}\n{start_time} --> {end_time}\n{word_text}\n\n")
                     subtitle_index += 1
             elif segment.text.strip():
                 # Fallback to segment-level timing
                 start_time = self._seconds_to_srt_time(segment.start)
                 end_time = self._seconds_to_srt_time(segment.end)
                 
-                srt_content += f"{subtitle_index}\n"
-                srt_content += f"{start_time} --> {end_time}\n"
-                srt_content += f"{segment.text.strip()}\n\n"
+                srt_parts.append(f"{subtitle_index}\n{start_time} --> {end_time}\n{segment.text.strip()}\n\n")
                 subtitle_index += 1
         
-        return srt_content
+        # Join once instead of repeated += which copies the whole string each time
+        return "".join(srt_parts)
     
     def _seconds_to_srt_time(self, seconds: float) -> str:
         """Convert seconds to SRT time format (HH:MM:SS,mmm)"""
-        hours = int(seconds // 3600)
-        minutes = int((seconds % 3600) // 60)
-        secs = int(seconds % 60)
-        milliseconds = int((seconds % 1) * 1000)
+        # Round rather than truncate: 2.01 * 1000 is 2009.999...
+        total_ms = round(seconds * 1000)
+        hours, total_ms = divmod(total_ms, 3_600_000)
+        minutes, total_ms = divmod(total_ms, 60_000)
+        secs, milliseconds = divmod(total_ms, 1000)
         return f"{hours:02d}:{minutes:02d}:{secs:02d},{milliseconds:03d}"
     
     def _hex_to_ass_color(self, color: str) -> str: